@@ -10,6 +10,7 @@ except DistributionNotFound:
 finally:
     del get_distribution, DistributionNotFound
 
-__all__ = ["cliques", "clockwork", "coaffinations", "cutpoints", "dominated",
-           "helly", "lists", "named", "pictures", "retractions", "simplicial",
+__all__ = ["batch", "behavior", "cache", "canonical", "cliques",
+           "clockwork", "coaffinations", "cutpoints", "dominated", "helly",
+           "lists", "named", "pictures", "retractions", "simplicial",
            "small", "special", "surfaces", "utilities", "visibility"]
@@ -0,0 +1,254 @@
+"""
+Functions that work on many graphs of the same (small) order at once.
+The graphs are given as a boolean array ``adjacency`` of shape ``(B, n,
+n)``, such as the ones given by :func:`pycliques.lists.adjacency_chunks`,
+and the results are arrays with one entry (or row) per graph.
+
+Internally, the closed neighborhood of each vertex is stored as a bit
+mask in an unsigned 64 bit integer, so the order must be at most 64,
+and sets of vertices of each graph are given by boolean arrays of shape
+``(B, n)``.
+"""
+
+import networkx as nx
+import numpy as np
+
+
+def _bits(n):
+    return np.left_shift(np.uint64(1), np.arange(n, dtype=np.uint64))
+
+
+def _closed_masks(adjacency, alive=None):
+    """The masks of the closed neighborhoods, of shape ``(B, n)``,
+    restricted to the vertices in ``alive``. The masks of the vertices
+    not in ``alive`` are 0."""
+    n = adjacency.shape[1]
+    bits = _bits(n)
+    masks = np.bitwise_or.reduce(np.where(adjacency, bits, np.uint64(0)),
+                                 axis=2) | bits
+    if alive is not None:
+        alive_mask = np.bitwise_or.reduce(np.where(alive, bits, np.uint64(0)),
+                                          axis=1)
+        masks = np.where(alive, masks & alive_mask[:, np.newaxis],
+                         np.uint64(0))
+    return masks
+
+
+def _dominance(masks):
+    """The array of shape ``(B, n, n)`` whose entry ``[b, u, v]`` says
+    whether ``u != v`` dominates ``v`` in the graph ``b``."""
+    n = masks.shape[1]
+    outside = masks[:, np.newaxis, :] & ~masks[:, :, np.newaxis]
+    dominance = (outside == 0) & ~np.eye(n, dtype=bool)
+    present = masks != 0
+    return dominance & present[:, :, np.newaxis] & present[:, np.newaxis, :]
+
+
+def dominated_vertices(adjacency, alive=None):
+    """The dominated vertices of many graphs
+
+    Args:
+      adjacency (numpy.ndarray): boolean array of shape ``(B, n, n)``
+      alive (numpy.ndarray): if given, boolean array of shape ``(B, n)``,
+        and each graph is replaced by its subgraph induced by these
+        vertices
+
+    Returns:
+      A boolean array of shape ``(B, n)`` that tells which vertices are
+      dominated in each graph.
+
+    Example:
+      >>> import networkx as nx
+      >>> import numpy as np
+      >>> from pycliques.batch import dominated_vertices
+      >>> adjacency = np.array([nx.to_numpy_array(nx.path_graph(4)),
+      ...                       nx.to_numpy_array(nx.cycle_graph(4))], bool)
+      >>> dominated_vertices(adjacency)
+      array([[ True, False, False,  True],
+             [False, False, False, False]])
+
+    """
+    return _dominance(_closed_masks(adjacency, alive)).any(axis=1)
+
+
+def twin_classes(adjacency):
+    """The classes of twin vertices of many graphs
+
+    Args:
+      adjacency (numpy.ndarray): boolean array of shape ``(B, n, n)``
+
+    Returns:
+      An integer array of shape ``(B, n)``, where the entry ``[b, v]`` is
+      the first twin of ``v`` (possibly ``v`` itself) in the graph
+      ``b``. This identifies the classes of
+      :func:`pycliques.dominated.twin_classes`.
+
+    Example:
+      >>> import networkx as nx
+      >>> import numpy as np
+      >>> from pycliques.batch import twin_classes
+      >>> g = nx.complete_multipartite_graph(1, 2, 1)
+      >>> twin_classes(np.array([nx.to_numpy_array(g)], bool))
+      array([[0, 1, 2, 0]])
+
+    """
+    masks = _closed_masks(adjacency)
+    twins = masks[:, :, np.newaxis] == masks[:, np.newaxis, :]
+    return twins.argmax(axis=1)
+
+
+def completely_pared(adjacency):
+    """The vertices of the completely pared graphs of many graphs
+
+    As :func:`pycliques.dominated.completely_pared_graph`, the first
+    dominated vertex is removed from each graph, until there are none.
+    All the graphs are handled at the same time, so this takes at most
+    ``n-1`` array passes.
+
+    Args:
+      adjacency (numpy.ndarray): boolean array of shape ``(B, n, n)``
+
+    Returns:
+      A boolean array of shape ``(B, n)``, with the vertices left in each
+      graph.
+
+    Example:
+      >>> import networkx as nx
+      >>> import numpy as np
+      >>> from pycliques.batch import completely_pared
+      >>> g = nx.cycle_graph(4)
+      >>> g.add_edge(0, 4)
+      >>> completely_pared(np.array([nx.to_numpy_array(g)], bool))
+      array([[ True,  True,  True,  True, False]])
+
+    """
+    count, n = adjacency.shape[:2]
+    alive = np.ones((count, n), dtype=bool)
+    active = np.arange(count)
+    while active.size:
+        dominated = dominated_vertices(adjacency[active], alive[active])
+        found = dominated.any(axis=1)
+        active = active[found]
+        alive[active, dominated[found].argmax(axis=1)] = False
+    return alive
+
+
+def is_dismantlable(adjacency):
+    """Whether each of many graphs is dismantlable, as a boolean array"""
+    return completely_pared(adjacency).sum(axis=1) == 1
+
+
+def _universal_masks(masks, common):
+    """For each pair ``x, y`` of each graph, the mask of the vertices of
+    ``common[b, x, y]`` adjacent or equal to all of its vertices."""
+    n = masks.shape[1]
+    bits = _bits(n)
+    inside = (common[..., np.newaxis] & bits) != 0
+    covered = (common[..., np.newaxis] &
+               ~masks[:, np.newaxis, np.newaxis, :]) == 0
+    return np.bitwise_or.reduce(np.where(inside & covered, bits,
+                                         np.uint64(0)), axis=3)
+
+
+def _triangles(adjacency):
+    """The boolean array of shape ``(B, n, n, n)`` of triangles"""
+    return adjacency[:, :, :, np.newaxis] & \
+        adjacency[:, :, np.newaxis, :] & adjacency[:, np.newaxis, :, :]
+
+
+def is_clique_helly(adjacency):
+    """Whether each of many graphs is clique-Helly
+
+    This is the test of :func:`pycliques.helly.is_clique_helly`, done
+    for all the triangles of all the graphs with array operations.
+
+    Args:
+      adjacency (numpy.ndarray): boolean array of shape ``(B, n, n)``
+
+    Returns:
+      A boolean array of length ``B``
+
+    Example:
+      >>> from pycliques.batch import is_clique_helly
+      >>> from pycliques.lists import adjacency_chunks
+      >>> [int(is_clique_helly(chunk).sum()) for chunk in adjacency_chunks(7)]
+      [775]
+
+    """
+    masks = _closed_masks(adjacency)
+    universal = _universal_masks(masks, masks[:, :, np.newaxis] &
+                                 masks[:, np.newaxis, :])
+    empty = (universal[:, :, :, np.newaxis] & universal[:, :, np.newaxis, :] &
+             universal[:, np.newaxis, :, :]) == 0
+    return ~np.any(_triangles(adjacency) & empty, axis=(1, 2, 3))
+
+
+def is_hereditary_clique_helly(adjacency):
+    """Whether each of many graphs is hereditary clique-Helly
+
+    This is the test of :func:`pycliques.helly.is_hereditary_clique_helly`,
+    done for all the triangles of all the graphs with array operations.
+
+    Args:
+      adjacency (numpy.ndarray): boolean array of shape ``(B, n, n)``
+
+    Returns:
+      A boolean array of length ``B``
+
+    Example:
+      >>> from pycliques.batch import is_hereditary_clique_helly
+      >>> from pycliques.lists import adjacency_chunks
+      >>> chunks = adjacency_chunks(7, size=500)
+      >>> [int(is_hereditary_clique_helly(chunk).sum()) for chunk in chunks]
+      [486, 285]
+
+    """
+    n = adjacency.shape[1]
+    bits = _bits(n)
+    masks = _closed_masks(adjacency)
+    opened = masks & ~bits
+    universal = _universal_masks(masks, opened[:, :, np.newaxis] &
+                                 opened[:, np.newaxis, :])
+    # the entry [b, x, y, z] says whether z is in the U-set of x, y
+    member = (universal[..., np.newaxis] & bits) != 0
+    bad = ~member & ~member.transpose(0, 1, 3, 2) & \
+        ~member.transpose(0, 3, 1, 2)
+    return ~np.any(_triangles(adjacency) & bad, axis=(1, 2, 3))
+
+
+def to_graphs(adjacency, alive=None):
+    """Generator of the NetworkX graphs of an adjacency tensor
+
+    Args:
+      adjacency (numpy.ndarray): boolean array of shape ``(B, n, n)``
+      alive (numpy.ndarray): if given, boolean array of shape ``(B, n)``,
+        and the subgraphs induced by these vertices are generated
+
+    Returns:
+      A generator of graphs, with vertices ``0, ..., n-1`` (or those in
+      ``alive``), in increasing order.
+
+    Example:
+      >>> import networkx as nx
+      >>> import numpy as np
+      >>> from pycliques.batch import completely_pared, to_graphs
+      >>> adjacency = np.array([nx.to_numpy_array(nx.path_graph(4))], bool)
+      >>> [list(g.nodes()) for g in to_graphs(adjacency)]
+      [[0, 1, 2, 3]]
+      >>> alive = completely_pared(adjacency)
+      >>> [list(g.nodes()) for g in to_graphs(adjacency, alive)]
+      [[3]]
+
+    """
+    n = adjacency.shape[1]
+    rows, cols = np.triu_indices(n, 1)
+    for b in range(adjacency.shape[0]):
+        vertices = range(n) if alive is None else np.flatnonzero(alive[b])
+        vertices = [int(v) for v in vertices]
+        present = np.zeros(n, dtype=bool)
+        present[vertices] = True
+        edges = adjacency[b, rows, cols] & present[rows] & present[cols]
+        graph = nx.Graph()
+        graph.add_nodes_from(vertices)
+        graph.add_edges_from(zip(rows[edges].tolist(), cols[edges].tolist()))
+        yield graph
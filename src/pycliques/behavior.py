@@ -0,0 +1,144 @@
+"""
+The *clique behavior* of a graph is whether it is convergent or divergent
+under the clique operator. Removing dominated vertices does not change
+the clique behavior [4]_, so we may work with the sequence of graphs
+:math:`T_0=G` and :math:`T_{n+1}=P(K(T_n))`, where :math:`P` is the
+completely pared graph. Two facts give a certificate of convergence:
+
+* A clique-Helly graph is convergent.
+* If :math:`K^p(T_n)\\cong T_n` for some :math:`p>0`, then :math:`T_n` is
+  convergent. This is the case if :math:`T_{n+p}\\cong T_n` and no vertex
+  was removed by :math:`P` between both levels.
+
+Isomorphisms are detected by comparing canonical forms, so the levels
+need not be kept.
+
+References
+----------
+.. [4] F. Frías-Armenta, V. Neumann-Lara and M. A. Pizaña. Dismantlings
+   and iterated clique graphs. Discrete Mathematics, 282 (2004)
+   pp. 263-265.
+"""
+
+import math
+
+from pycliques.canonical import canonical_form
+from pycliques.cliques import iterated_clique_graphs
+from pycliques.helly import is_clique_helly
+
+
+class CliqueBehavior(object):
+    """What :func:`clique_behavior` found about a graph.
+
+    The attribute ``reason`` is one of:
+
+    * ``"helly"``: the level ``index`` is clique-Helly.
+    * ``"periodic"``: the level ``index + period`` is isomorphic to the
+      level ``index``, and no vertex was pared in between.
+    * ``"cycle"``: as before, but some vertices were pared in between.
+      This does not decide the behavior, but further levels would only
+      repeat the same ones.
+    * ``"index"``, ``"order"``, ``"size"``, ``"bytes"`` or ``"time"``: the
+      tower of clique graphs was stopped by that bound before any of the
+      above happened.
+
+    The list ``orders`` has the orders of the levels computed, and
+    ``pared[i]`` says whether the level ``i`` lost vertices when pared.
+    """
+    def __init__(self):
+        self.reason = None
+        self.index = None
+        self.period = None
+        self.form = None
+        self.orders = []
+        self.pared = []
+
+    def __repr__(self):
+        return (f"CliqueBehavior(reason={self.reason!r}, index={self.index},"
+                f" period={self.period}, orders={self.orders})")
+
+    @property
+    def convergent(self):
+        """True if convergence was proved, None otherwise"""
+        return True if self.reason in ("helly", "periodic") else None
+
+    def verify(self, graph):
+        """Check this certificate of convergence for ``graph`` again
+
+        The levels up to ``index + period`` are recomputed, without any
+        bounds.
+        """
+        if not self.convergent:
+            return False
+        last = self.index if self.reason == "helly" else self.index+self.period
+        tower = iterated_clique_graphs(graph, last)
+        for i, level in tower:
+            if i == self.index:
+                if self.reason == "helly":
+                    return is_clique_helly(level)
+                form = canonical_form(level)
+            elif i > self.index and tower.unpared_order != level.order():
+                return False
+        return canonical_form(level) == form
+
+
+def clique_behavior(graph, max_index=8, max_order=math.inf,
+                    max_size=math.inf, max_bytes=math.inf,
+                    timeout=math.inf):
+    """Look for a certificate of the clique behavior of a graph
+
+    The iterated clique graphs are computed and pared, one at a time,
+    until one of them is clique-Helly or isomorphic to an earlier one,
+    or until the bounds are reached. See :class:`CliqueBehavior`.
+
+    Args:
+      graph (networkx.classes.graph.Graph): graph
+      max_index (int): largest index of an iterated clique graph computed
+      max_order, max_size, max_bytes, timeout: bounds as in
+        :func:`pycliques.cliques.iterated_clique_graphs`
+
+    Returns:
+      A :class:`CliqueBehavior`
+
+    Example:
+      >>> import networkx as nx
+      >>> from pycliques.behavior import clique_behavior
+      >>> g = nx.triangular_lattice_graph(3, 3)
+      >>> behavior = clique_behavior(g)
+      >>> behavior
+      CliqueBehavior(reason='helly', index=1, period=None, orders=[10, 1])
+      >>> behavior.verify(g)
+      True
+      >>> behavior = clique_behavior(nx.octahedral_graph(), max_order=100)
+      >>> behavior.reason, behavior.index, behavior.orders
+      ('order', None, [6, 8, 16])
+      >>> behavior.convergent is None
+      True
+
+    """
+    behavior = CliqueBehavior()
+    tower = iterated_clique_graphs(graph, max_index, max_order=max_order,
+                                   max_size=max_size, max_bytes=max_bytes,
+                                   timeout=timeout)
+    seen = dict()
+    for i, level in tower:
+        behavior.orders.append(level.order())
+        behavior.pared.append(tower.unpared_order != level.order())
+        form = canonical_form(level)
+        if form in seen:
+            behavior.index = seen[form]
+            behavior.period = i-seen[form]
+            behavior.form = form
+            if any(behavior.pared[behavior.index+1:]):
+                behavior.reason = "cycle"
+            else:
+                behavior.reason = "periodic"
+            return behavior
+        if is_clique_helly(level):
+            behavior.reason = "helly"
+            behavior.index = i
+            behavior.form = form
+            return behavior
+        seen[form] = i
+    behavior.reason = tower.reason
+    return behavior
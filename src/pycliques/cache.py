@@ -0,0 +1,188 @@
+"""
+Many graphs have isomorphic iterated clique graphs, and from the first
+level where that happens on, their towers are the same. This file
+defines a cache for the results of the clique operator (and of the
+completely pared graph), keyed by the canonical form of the argument,
+so that each of those results is computed once. The cache keeps the
+most recently used results in memory, and can also keep all of them in
+an SQLite file, so that they are available to later runs.
+
+Since the keys only depend on isomorphism types, the results are
+given up to isomorphism: their vertices are ``0, ..., n-1``, in
+canonical order.
+"""
+
+import collections
+import math
+import sqlite3
+
+import networkx as nx
+
+from pycliques.canonical import canonical_form
+from pycliques.cliques import _build_clique_graph, _BudgetExceeded, \
+    _NODE_BYTES, _EDGE_BYTES
+from pycliques.dominated import completely_pared_graph
+
+
+def _from_form(form):
+    return nx.from_graph6_bytes(form.encode())
+
+
+class CliqueCache(object):
+    """Cache of clique graphs and completely pared graphs
+
+    Each argument is put in canonical form, which takes longer than the
+    clique operator on small graphs, and much longer on large symmetric
+    ones (5 to 17 seconds for the 256 vertices of the third clique graph
+    of the octahedron). So the cache pays off when the same results are
+    asked for again, mostly from the SQLite file in a later run.
+
+    Args:
+      maxsize (int): number of results kept in memory
+      path (str): file of an SQLite database where all the results are
+        also kept. It is created if it does not exist.
+
+    Example:
+      >>> import networkx as nx
+      >>> from pycliques.cache import CliqueCache
+      >>> cache = CliqueCache()
+      >>> cache.clique_graph(nx.octahedral_graph()).order()
+      8
+      >>> g = nx.relabel_nodes(nx.octahedral_graph(), {0: 'a'})
+      >>> cache.clique_graph(g).order()
+      8
+      >>> cache.hits, cache.misses
+      (1, 1)
+      >>> cache.clique_graph(nx.octahedral_graph(), bound=5) is None
+      True
+
+    """
+    def __init__(self, maxsize=4096, path=None):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._memory = collections.OrderedDict()
+        self._db = None
+        self._pending = 0
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS results "
+                             "(operation TEXT, form TEXT, result TEXT, "
+                             "ord INTEGER, size INTEGER, bound REAL, "
+                             "PRIMARY KEY (operation, form))")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Write the pending results to the database, and close it"""
+        if self._db is not None:
+            self._db.commit()
+            self._db.close()
+            self._db = None
+
+    def _get(self, key):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        if self._db is not None:
+            row = self._db.execute("SELECT result, ord, size, bound FROM "
+                                   "results WHERE operation=? AND form=?",
+                                   key).fetchone()
+            if row is not None:
+                self._remember(key, row)
+                return row
+        return None
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _put(self, key, entry):
+        self._remember(key, entry)
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO results VALUES "
+                             "(?, ?, ?, ?, ?, ?)", key+tuple(entry))
+            self._pending = self._pending+1
+            if self._pending >= 100:
+                self._db.commit()
+                self._pending = 0
+
+    def tower_step(self, graph, form=None, pare=True, max_order=math.inf,
+                   max_size=math.inf, max_bytes=math.inf,
+                   deadline=math.inf, processes=1):
+        """The clique graph of ``graph``, pared if ``pare`` is True.
+
+        This is the step used by
+        :func:`pycliques.cliques.iterated_clique_graphs` when given a
+        cache. Here ``form`` is the canonical form of ``graph``, if
+        known. Returns a triple with the resulting graph, its canonical
+        form and the order of the clique graph before paring. Raises
+        ``_BudgetExceeded`` if the clique graph is beyond the bounds.
+        """
+        if form is None:
+            form = canonical_form(graph)
+        key = ("pared" if pare else "clique", form)
+        entry = self._get(key)
+        if entry is not None:
+            result, order, size, bound = entry
+            if result is not None:
+                self.hits = self.hits+1
+                if order > max_order:
+                    raise _BudgetExceeded("order")
+                if size > max_size:
+                    raise _BudgetExceeded("size")
+                if order*_NODE_BYTES+size*_EDGE_BYTES > max_bytes:
+                    raise _BudgetExceeded("bytes")
+                return _from_form(result), result, order
+            if max_order <= bound:
+                self.hits = self.hits+1
+                raise _BudgetExceeded("order")
+        self.misses = self.misses+1
+        try:
+            k = _build_clique_graph(graph, max_order=max_order,
+                                    max_size=max_size, max_bytes=max_bytes,
+                                    deadline=deadline, processes=processes)
+        except _BudgetExceeded as budget:
+            if budget.args[0] == "order":
+                self._put(key, (None, None, None, max_order))
+            raise
+        order, size = k.order(), k.size()
+        if pare:
+            k = completely_pared_graph(k)
+        result = canonical_form(k)
+        self._put(key, (result, order, size, None))
+        return _from_form(result), result, order
+
+    def clique_graph(self, graph, bound=math.inf):
+        """The clique graph of ``graph``, or None if its order is greater
+        than ``bound``"""
+        try:
+            return self.tower_step(graph, pare=False, max_order=bound)[0]
+        except _BudgetExceeded:
+            return None
+
+    def pared_clique_graph(self, graph, bound=math.inf):
+        """The completely pared graph of the clique graph of ``graph``, or
+        None if the order of the clique graph is greater than ``bound``"""
+        try:
+            return self.tower_step(graph, pare=True, max_order=bound)[0]
+        except _BudgetExceeded:
+            return None
+
+    def completely_pared_graph(self, graph):
+        """The completely pared graph of ``graph``"""
+        key = ("pare", canonical_form(graph))
+        entry = self._get(key)
+        if entry is not None:
+            self.hits = self.hits+1
+            return _from_form(entry[0])
+        self.misses = self.misses+1
+        result = canonical_form(completely_pared_graph(graph))
+        self._put(key, (result, None, None, None))
+        return _from_form(result)
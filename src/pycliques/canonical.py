@@ -0,0 +1,261 @@
+"""
+A *canonical form* of graphs is a function that assigns to each graph a
+string, in such a way that two graphs get the same string if and only
+if they are isomorphic. Here it is computed with the usual
+individualization-refinement search, as in McKay's nauty, and the
+string is the graph6 encoding of a canonically relabeled copy of the
+graph.
+"""
+
+import heapq
+
+import networkx as nx
+
+
+# An ordered partition of the vertices ``0, ..., n-1`` is stored as a
+# triple ``(order, cell_of, ends)``: the cells are the consecutive
+# blocks ``order[a:ends[a]]``, and ``cell_of[v]`` is the start ``a`` of
+# the cell containing ``v``. The starts of the cells, and so their
+# order, only depend on the isomorphism type of the graph together with
+# the vertices individualized so far.
+
+
+def _refine(adj, partition, pending):
+    """Refine ``partition`` in place to the coarsest equitable partition
+    finer than it, using the cells starting at ``pending`` as the first
+    splitters."""
+    order, cell_of, ends = partition
+    heap = list(pending)
+    heapq.heapify(heap)
+    in_heap = set(heap)
+    while heap:
+        s = heapq.heappop(heap)
+        in_heap.discard(s)
+        count = dict()
+        for v in order[s:ends[s]]:
+            for u in adj[v]:
+                count[u] = count.get(u, 0)+1
+        touched = {cell_of[u] for u in count}
+        for a in touched:
+            b = ends[a]
+            if b-a == 1:
+                continue
+            groups = dict()
+            for v in order[a:b]:
+                groups.setdefault(count.get(v, 0), []).append(v)
+            if len(groups) == 1:
+                continue
+            parts = [groups[k] for k in sorted(groups)]
+            starts = []
+            position = a
+            for part in parts:
+                starts.append(position)
+                order[position:position+len(part)] = part
+                for v in part:
+                    cell_of[v] = position
+                ends[position] = position+len(part)
+                position = position+len(part)
+            if a in in_heap:
+                new = starts[1:]
+            else:
+                sizes = [len(part) for part in parts]
+                largest = sizes.index(max(sizes))
+                new = starts[:largest]+starts[largest+1:]
+            for start in new:
+                heapq.heappush(heap, start)
+                in_heap.add(start)
+
+
+def _individualize(adj, partition, v):
+    """A refined copy of ``partition`` where ``v`` has been split from
+    its cell, and placed first."""
+    order, cell_of, ends = partition
+    order, cell_of, ends = list(order), list(cell_of), dict(ends)
+    a = cell_of[v]
+    b = ends[a]
+    order[a:b] = [v]+[u for u in order[a:b] if u != v]
+    ends[a] = a+1
+    ends[a+1] = b
+    for u in order[a+1:b]:
+        cell_of[u] = a+1
+    partition = (order, cell_of, ends)
+    _refine(adj, partition, [a])
+    return partition
+
+
+def _certificate(adj, order):
+    position = [None]*len(order)
+    for i, v in enumerate(order):
+        position[v] = i
+    return tuple(sorted((position[v], position[u]) for v in order
+                        for u in adj[v] if position[u] > position[v]))
+
+
+def _common_prefix(path1, path2):
+    k = 0
+    while k < min(len(path1), len(path2)) and path1[k] == path2[k]:
+        k = k+1
+    return k
+
+
+def _find(parent, v):
+    while parent[v] != v:
+        parent[v] = parent[parent[v]]
+        v = parent[v]
+    return v
+
+
+def _search(adj, partition, path, state):
+    """Depth first search of the tree of refined partitions.
+
+    Returns None, or the depth to which the search can jump back: when
+    a leaf gives an automorphism, the subtree that contains it is the
+    image of an already explored subtree.
+    """
+    order, cell_of, ends = partition
+    a = 0
+    while a < len(order) and ends[a]-a == 1:
+        a = ends[a]
+    if a == len(order):
+        cert = _certificate(adj, order)
+        for leaf in (state["first"], state["best"]):
+            if leaf is not None and cert == leaf[0]:
+                gamma = [None]*len(adj)
+                for v, w in zip(leaf[1], order):
+                    gamma[v] = w
+                moved = {v for v in range(len(adj)) if gamma[v] != v}
+                state["automorphisms"].append((gamma, moved))
+                return _common_prefix(leaf[2], path)
+        if state["first"] is None:
+            state["first"] = (cert, order, path)
+        if state["best"] is None or cert < state["best"][0]:
+            state["best"] = (cert, order, path)
+        return None
+    target = order[a:ends[a]]
+    fixed = set(path)
+    # orbits of the automorphisms found so far that fix ``path``
+    parent = {v: v for v in target}
+    checked = 0
+    explored = []
+    roots = set()
+    for v in target:
+        automorphisms = state["automorphisms"]
+        if checked < len(automorphisms):
+            for gamma, moved in automorphisms[checked:]:
+                if moved.isdisjoint(fixed):
+                    for w in moved:
+                        if w in parent:
+                            parent[_find(parent, w)] = _find(parent, gamma[w])
+            checked = len(automorphisms)
+            roots = {_find(parent, u) for u in explored}
+        if _find(parent, v) in roots:
+            continue
+        explored.append(v)
+        roots.add(_find(parent, v))
+        child = _individualize(adj, partition, v)
+        jump = _search(adj, child, path+[v], state)
+        if jump is not None and jump < len(path):
+            return jump
+    return None
+
+
+def _adjacency(graph):
+    vertices = list(graph)
+    ids = {v: i for i, v in enumerate(vertices)}
+    adj = [{ids[u] for u in graph[v] if u != v} for v in vertices]
+    return vertices, adj
+
+
+def canonical_labeling(graph):
+    """A canonical labeling of a graph
+
+    Args:
+      graph (networkx.classes.graph.Graph): graph
+
+    Returns:
+      A dictionary that maps each vertex of graph to an integer in
+      ``range(graph.order())``, in such a way that relabeling two
+      isomorphic graphs with their canonical labelings gives the same
+      graph.
+
+    Example:
+      >>> import networkx as nx
+      >>> from pycliques.canonical import canonical_labeling
+      >>> canonical_labeling(nx.path_graph(3))
+      {0: 0, 2: 1, 1: 2}
+
+    """
+    vertices, state = _run_search(graph)
+    if not vertices:
+        return dict()
+    order = state["best"][1]
+    return {vertices[v]: i for i, v in enumerate(order)}
+
+
+def _run_search(graph):
+    vertices, adj = _adjacency(graph)
+    state = {"first": None, "best": None, "automorphisms": []}
+    if vertices:
+        n = len(vertices)
+        partition = (list(range(n)), [0]*n, {0: n})
+        _refine(adj, partition, [0])
+        _search(adj, partition, [], state)
+    return vertices, state
+
+
+def automorphism_generators(graph):
+    """Generators of the automorphism group of a graph
+
+    These are the automorphisms found by the search of
+    :func:`canonical_labeling`, which generate the whole group, so the
+    group itself is never listed.
+
+    Args:
+      graph (networkx.classes.graph.Graph): graph
+
+    Returns:
+      A list of automorphisms, as dictionaries, that generate the group
+      of automorphisms of graph. It is empty if the group is trivial.
+
+    Example:
+      >>> import networkx as nx
+      >>> from pycliques.canonical import automorphism_generators
+      >>> automorphism_generators(nx.path_graph(3))
+      [{0: 2, 1: 1, 2: 0}]
+      >>> len(automorphism_generators(nx.octahedral_graph()))
+      3
+
+    """
+    vertices, state = _run_search(graph)
+    return [{vertices[v]: vertices[gamma[v]] for v in range(len(vertices))}
+            for gamma, moved in state["automorphisms"]]
+
+
+def canonical_form(graph):
+    """The canonical form of a graph, in graph6 format
+
+    Args:
+      graph (networkx.classes.graph.Graph): graph
+
+    Returns:
+      A string, without header, that is equal for two graphs if and only
+      if they are isomorphic.
+
+    Example:
+      >>> import networkx as nx
+      >>> from pycliques.canonical import canonical_form
+      >>> canonical_form(nx.cycle_graph(5))
+      'DLo'
+      >>> g = nx.relabel_nodes(nx.cycle_graph(5), {0: 2, 2: 0})
+      >>> canonical_form(g) == canonical_form(nx.cycle_graph(5))
+      True
+      >>> canonical_form(nx.path_graph(5)) == canonical_form(nx.cycle_graph(5))
+      False
+
+    """
+    labeling = canonical_labeling(graph)
+    relabeled = nx.Graph()
+    relabeled.add_nodes_from(range(len(labeling)))
+    relabeled.add_edges_from((labeling[u], labeling[v])
+                             for (u, v) in graph.edges() if u != v)
+    return nx.to_graph6_bytes(relabeled, header=False).decode().strip()
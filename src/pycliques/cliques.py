@@ -12,8 +12,12 @@ import networkx as nx
 import numpy as np
 import itertools
 import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 from pycliques.coaffinations import CoaffinePair
+from pycliques.dominated import completely_pared_graph
 
 
 class Clique(frozenset):
@@ -31,7 +35,135 @@ class Clique(frozenset):
             return f"{u}"
 
 
-def clique_graph(graph, bound=math.inf):
+class CliqueTable(object):
+    """Compact record of the cliques of a graph.
+
+    The vertices of the graph are numbered following the list
+    ``vertices``, and the members of the clique with number ``i`` are
+    the vertices numbered ``indices[indptr[i]:indptr[i+1]]``. This is
+    what ``clique_graph(graph, compact=True)`` uses to remember the
+    contents of the cliques, since its nodes are just integers.
+    """
+    def __init__(self, vertices, members):
+        self.vertices = list(vertices)
+        self.indptr = np.zeros(len(members)+1, dtype=np.int64)
+        np.cumsum([len(m) for m in members], out=self.indptr[1:])
+        self.indices = np.fromiter(itertools.chain.from_iterable(members),
+                                   dtype=np.int32, count=self.indptr[-1])
+
+    def __len__(self):
+        return len(self.indptr)-1
+
+    def members(self, i):
+        """The numbers of the vertices in the clique ``i``"""
+        return self.indices[self.indptr[i]:self.indptr[i+1]]
+
+    def clique(self, i):
+        """The clique ``i``, in terms of the vertices of the graph"""
+        return Clique(self.vertices[j] for j in self.members(i))
+
+
+class CliqueMatrix(object):
+    """The clique graph of a graph, without a NetworkX graph.
+
+    The attribute ``table`` is the :class:`CliqueTable` of the cliques,
+    that is, the clique-vertex incidence matrix :math:`M` in compressed
+    rows, and ``adjacency`` is the adjacency matrix of the clique graph,
+    the pattern of nonzero entries of :math:`MM^T` outside the
+    diagonal. It is stored with ``np.packbits``, one row per clique, so
+    it takes ``k*k/8`` bytes for ``k`` cliques. This is what
+    ``clique_graph(graph, matrix=True)`` returns.
+    """
+    # number of pairs of incident cliques handled at once, and number of
+    # bytes of the adjacency matrix updated or counted at once
+    _BATCH = 1 << 18
+    # number of bits set in each byte
+    _POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis],
+                              axis=1).sum(axis=1, dtype=np.uint8)
+
+    def __init__(self, table):
+        self.table = table
+        k = len(table)
+        self.adjacency = np.zeros((k, (k+7)//8), dtype=np.uint8)
+        columns = np.repeat(np.arange(k, dtype=np.int64),
+                            np.diff(table.indptr))
+        by_vertex = np.argsort(table.indices, kind="stable")
+        cliques = columns[by_vertex]
+        starts = np.searchsorted(table.indices[by_vertex],
+                                 np.arange(len(table.vertices)+1))
+        rows, cols = [], []
+        pending = 0
+        for a, b in zip(starts[:-1], starts[1:]):
+            incident = cliques[a:b]
+            if (b-a)**2 > self._BATCH:
+                self._set_rows(incident)
+                continue
+            if pending+(b-a)**2 > self._BATCH:
+                self._set(np.concatenate(rows), np.concatenate(cols))
+                rows, cols = [], []
+                pending = 0
+            rows.append(np.repeat(incident, b-a))
+            cols.append(np.tile(incident, b-a))
+            pending = pending+(b-a)**2
+        if rows:
+            self._set(np.concatenate(rows), np.concatenate(cols))
+        diagonal = np.arange(k)
+        self.adjacency[diagonal, diagonal >> 3] &= \
+            ~(np.uint8(128) >> (diagonal & 7)).astype(np.uint8)
+
+    def _set(self, rows, cols):
+        np.bitwise_or.at(self.adjacency, (rows, cols >> 3),
+                         (np.uint8(128) >> (cols & 7)).astype(np.uint8))
+
+    def _set_rows(self, incident):
+        # the cliques through a vertex in many cliques are packed into
+        # one row, which is added to their rows a block at a time
+        row = np.zeros(self.adjacency.shape[1], dtype=np.uint8)
+        np.bitwise_or.at(row, incident >> 3,
+                         (np.uint8(128) >> (incident & 7)).astype(np.uint8))
+        step = max(1, self._BATCH // len(row))
+        for start in range(0, len(incident), step):
+            self.adjacency[incident[start:start+step]] |= row
+
+    def order(self):
+        """The number of cliques"""
+        return len(self.table)
+
+    def degrees(self):
+        """The array of degrees of the vertices of the clique graph"""
+        k, width = self.adjacency.shape
+        result = np.zeros(k, dtype=np.int64)
+        step = max(1, self._BATCH // max(1, width))
+        for start in range(0, k, step):
+            block = self.adjacency[start:start+step]
+            result[start:start+step] = self._POPCOUNT[block].sum(
+                axis=1, dtype=np.int64)
+        return result
+
+    def size(self):
+        """The number of edges of the clique graph"""
+        return int(self.degrees().sum())//2
+
+    def neighbors(self, i):
+        """The array of neighbors of the vertex ``i``"""
+        return np.flatnonzero(np.unpackbits(self.adjacency[i],
+                                            count=self.order()))
+
+    def has_edge(self, i, j):
+        """Whether the vertices ``i`` and ``j`` are adjacent"""
+        return bool(self.adjacency[i, j >> 3] & (128 >> (j & 7)))
+
+    def to_graph(self):
+        """The clique graph as a NetworkX graph on ``0, ..., k-1``"""
+        K = nx.Graph()
+        K.add_nodes_from(range(self.order()))
+        for i in range(self.order()):
+            K.add_edges_from((i, int(j)) for j in self.neighbors(i) if j > i)
+        return K
+
+
+def clique_graph(graph, bound=math.inf, algorithm="incidence",
+                 compact=False, processes=1, matrix=False):
     """The clique graph operator
 
     Parameters
@@ -42,10 +174,32 @@ def clique_graph(graph, bound=math.inf):
     bound : int
             Upper bound accepted for order of clique graph
 
+    algorithm : str
+            Either ``"incidence"`` (the default), which only compares
+            cliques sharing a vertex, or ``"pairs"``, which tests every
+            pair of cliques. Both give the same graph.
+
+    compact : bool
+            If True, the vertices of the clique graph are the integers
+            ``0, ..., k-1`` and the contents of the cliques are returned
+            separately as a :class:`CliqueTable`.
+
+    processes : int
+            Number of processes used to find the cliques, see
+            :func:`parallel_find_cliques`. With more than one process
+            the order of the vertices may change.
+
+    matrix : bool
+            If True, no NetworkX graph is built, and the clique graph is
+            returned as a :class:`CliqueMatrix`, with the incidence
+            matrix of the cliques and a bit-packed adjacency matrix.
+
     Returns
     -------
     NetworkX graph
-        the clique graph of graph
+        the clique graph of graph, the pair ``(K, table)`` if
+        ``compact`` is True, or a :class:`CliqueMatrix` if ``matrix`` is
+        True
 
     Examples
     --------
@@ -54,27 +208,544 @@ def clique_graph(graph, bound=math.inf):
     >>> g=clique_graph(nx.octahedral_graph())
     >>> g.nodes()
     NodeView(({0, 1, 2}, {0, 1, 3}, {0, 2, 4}, {0, 3, 4}, {1, 2, 5}, {1, 3, 5}, {2, 4, 5}, {3, 4, 5}))
+    >>> k, table = clique_graph(nx.octahedral_graph(), compact=True)
+    >>> k.nodes()
+    NodeView((0, 1, 2, 3, 4, 5, 6, 7))
+    >>> table.clique(7)
+    {3, 4, 5}
+    >>> m = clique_graph(nx.octahedral_graph(), matrix=True)
+    >>> m.order(), m.size()
+    (8, 24)
+    >>> m.neighbors(7)
+    array([1, 2, 3, 4, 5, 6])
 
     """
     if isinstance(graph, CoaffinePair):
         return _k_coaffine_pair(graph, bound)
-    it_cliques = nx.find_cliques(graph)
-    cliques = []
+    try:
+        return _build_clique_graph(graph, algorithm, compact, max_order=bound,
+                                   processes=processes, matrix=matrix)
+    except _BudgetExceeded:
+        return None
+
+
+# Rough number of bytes taken by a node and by an edge of a NetworkX
+# graph, used to turn a memory budget into bounds on order and size.
+_NODE_BYTES = 400
+_EDGE_BYTES = 250
+
+
+class _BudgetExceeded(Exception):
+    """Raised when a clique graph would exceed a budget. The argument is
+    the name of the exhausted budget."""
+
+
+def _build_clique_graph(graph, algorithm="incidence", compact=False,
+                        max_order=math.inf, max_size=math.inf,
+                        max_bytes=math.inf, deadline=math.inf, processes=1,
+                        matrix=False):
+    """The clique graph, raising ``_BudgetExceeded`` as soon as its order,
+    its size or its estimated memory goes beyond the given bounds, or
+    the time goes beyond ``deadline`` (as given by ``time.monotonic``)."""
+    timed = deadline < math.inf
+    if processes > 1:
+        cliques = _parallel_cliques(graph, processes, max_order, deadline)
+    else:
+        cliques = []
+        for clique in nx.find_cliques(graph):
+            cliques.append(clique)
+            if len(cliques) > max_order:
+                raise _BudgetExceeded("order")
+            if timed and time.monotonic() > deadline:
+                raise _BudgetExceeded("time")
+    if matrix:
+        return _build_clique_matrix(graph, cliques, max_size, max_bytes)
+    if len(cliques)*_NODE_BYTES > max_bytes:
+        raise _BudgetExceeded("bytes")
+    size_for_bytes = (max_bytes - len(cliques)*_NODE_BYTES) / _EDGE_BYTES
     K = nx.Graph()
-    while True:
-        try:
-            clique = next(it_cliques)
-            cliques.append(Clique(clique))
-            if len(cliques) > bound:
-                return None
-        except StopIteration:
-            break
-    K.add_nodes_from(cliques)
-    clique_pairs = itertools.combinations(cliques, 2)
-    K.add_edges_from((c1, c2) for (c1, c2) in clique_pairs if c1 & c2)
+    if compact:
+        ids = {v: i for i, v in enumerate(graph)}
+        members = [frozenset(ids[v] for v in q) for q in cliques]
+        K.add_nodes_from(range(len(members)))
+        edges = _clique_edges(members, algorithm)
+    else:
+        cliques = [Clique(q) for q in cliques]
+        K.add_nodes_from(cliques)
+        edges = ((cliques[i], cliques[j])
+                 for (i, j) in _clique_edges(cliques, algorithm))
+    if timed or max_size < math.inf or max_bytes < math.inf:
+        edges = _within_budget(edges, max_size, size_for_bytes, deadline)
+    K.add_edges_from(edges)
+    if compact:
+        return K, CliqueTable(ids, [sorted(q) for q in members])
     return K
 
 
+def _build_clique_matrix(graph, cliques, max_size, max_bytes):
+    k = len(cliques)
+    if k*((k+7)//8) > max_bytes:
+        raise _BudgetExceeded("bytes")
+    ids = {v: i for i, v in enumerate(graph)}
+    result = CliqueMatrix(CliqueTable(ids, [sorted(ids[v] for v in q)
+                                            for q in cliques]))
+    if max_size < math.inf and result.size() > max_size:
+        raise _BudgetExceeded("size")
+    return result
+
+
+def _within_budget(edges, max_size, size_for_bytes, deadline):
+    for size, edge in enumerate(edges, 1):
+        if size > max_size:
+            raise _BudgetExceeded("size")
+        if size > size_for_bytes:
+            raise _BudgetExceeded("bytes")
+        if size % 1024 == 0 and time.monotonic() > deadline:
+            raise _BudgetExceeded("time")
+        yield edge
+
+
+def _degeneracy_order(adj):
+    """The vertices ``0, ..., n-1`` of the graph with adjacency sets
+    ``adj``, in an order where each vertex has as few later neighbors
+    as possible."""
+    degree = [len(neighbors) for neighbors in adj]
+    buckets = [set() for _ in range(max(degree, default=0)+1)]
+    for v, d in enumerate(degree):
+        buckets[d].add(v)
+    order = []
+    done = [False]*len(adj)
+    d = 0
+    for _ in range(len(adj)):
+        d = max(d-1, 0)
+        while not buckets[d]:
+            d = d+1
+        v = buckets[d].pop()
+        order.append(v)
+        done[v] = True
+        for u in adj[v]:
+            if not done[u]:
+                buckets[degree[u]].remove(u)
+                degree[u] = degree[u]-1
+                buckets[degree[u]].add(u)
+    return order
+
+
+def _pivot_cliques(adj, clique, candidates, excluded):
+    """Bron-Kerbosch with pivoting: the maximal cliques that contain
+    ``clique``, contained in ``clique | candidates`` and that do not
+    contain any vertex of ``excluded``."""
+    if not candidates and not excluded:
+        yield clique
+        return
+    pivot = max(candidates | excluded, key=lambda u: len(candidates & adj[u]))
+    for v in list(candidates - adj[pivot]):
+        yield from _pivot_cliques(adj, clique+[v], candidates & adj[v],
+                                  excluded & adj[v])
+        candidates.remove(v)
+        excluded.add(v)
+
+
+def _moon_moser(k):
+    """The largest number of maximal cliques of a graph of order k"""
+    if k < 2:
+        return 1
+    elif k % 3 == 0:
+        return 3**(k//3)
+    elif k % 3 == 1:
+        return 4*3**((k-4)//3)
+    else:
+        return 2*3**((k-2)//3)
+
+
+def cliques_upper_bound(graph):
+    """An upper bound for the number of cliques of a graph
+
+    Each clique of the graph is determined by its first vertex ``v`` in
+    a degeneracy order, together with a maximal clique of the subgraph
+    induced by the later neighbors of ``v``. The bound is computed with
+    the Moon-Moser bound for those subgraphs, in time linear in the size
+    of the graph.
+
+    Parameters
+    ----------
+    graph : NetworkX graph
+        An undirected graph
+
+    Returns
+    -------
+    int
+        An upper bound for the order of the clique graph of ``graph``
+
+    Examples
+    --------
+    >>> import networkx as nx
+    >>> from pycliques.cliques import cliques_upper_bound
+    >>> cliques_upper_bound(nx.octahedral_graph())
+    13
+    >>> cliques_upper_bound(nx.path_graph(5))
+    5
+
+    """
+    vertices = list(graph)
+    ids = {v: i for i, v in enumerate(vertices)}
+    adj = [{ids[u] for u in graph[v] if u != v} for v in vertices]
+    done = [False]*len(adj)
+    total = 0
+    for v in _degeneracy_order(adj):
+        done[v] = True
+        total = total+_moon_moser(sum(1 for u in adj[v] if not done[u]))
+    return total
+
+
+def count_cliques(graph, bound=math.inf):
+    """The number of cliques of a graph, without keeping them
+
+    Parameters
+    ----------
+    graph : NetworkX graph
+        An undirected graph
+    bound : int
+        Upper bound for the number of cliques
+
+    Returns
+    -------
+    int
+        The number of cliques of ``graph``, or None if it is greater
+        than ``bound``. In the latter case the count stops as soon as
+        ``bound + 1`` cliques are found.
+
+    Examples
+    --------
+    >>> import networkx as nx
+    >>> from pycliques.cliques import count_cliques
+    >>> count_cliques(nx.octahedral_graph())
+    8
+    >>> count_cliques(nx.octahedral_graph(), 7) is None
+    True
+
+    """
+    count = 0
+    for _ in nx.find_cliques(graph):
+        count = count+1
+        if count > bound:
+            return None
+    return count
+
+
+# State of a worker process of parallel_find_cliques
+_worker = dict()
+
+
+def _init_clique_worker(adj, counter, bound, deadline):
+    _worker["adj"] = adj
+    _worker["counter"] = counter
+    _worker["bound"] = bound
+    _worker["deadline"] = deadline
+
+
+def _cliques_of_subproblems(subproblems):
+    """Solve some of the subproblems of parallel_find_cliques. Returns
+    the pair ``(None, cliques)``, or the name of the exhausted budget
+    and None."""
+    adj = _worker["adj"]
+    counter = _worker["counter"]
+    bound = _worker["bound"]
+    deadline = _worker["deadline"]
+    cliques = []
+    reported = 0
+    for v, later, earlier in subproblems:
+        for clique in _pivot_cliques(adj, [v], set(later), set(earlier)):
+            cliques.append(clique)
+            if len(cliques)-reported == 64:
+                with counter.get_lock():
+                    counter.value = counter.value+64
+                reported = len(cliques)
+            if counter.value+len(cliques)-reported > bound:
+                with counter.get_lock():
+                    counter.value = counter.value+len(cliques)-reported
+                return "order", None
+            if time.monotonic() > deadline:
+                return "time", None
+    with counter.get_lock():
+        counter.value = counter.value+len(cliques)-reported
+    return None, cliques
+
+
+def _parallel_cliques(graph, processes, bound=math.inf, deadline=math.inf):
+    """Cliques of graph as lists of vertices, found by ``processes``
+    processes, or raise ``_BudgetExceeded``."""
+    vertices = list(graph)
+    ids = {v: i for i, v in enumerate(vertices)}
+    adj = [{ids[u] for u in graph[v] if u != v} for v in vertices]
+    position = [None]*len(adj)
+    for i, v in enumerate(_degeneracy_order(adj)):
+        position[v] = i
+    subproblems = [(v, [u for u in adj[v] if position[u] > position[v]],
+                    [u for u in adj[v] if position[u] < position[v]])
+                   for v in range(len(adj))]
+    chunks = [subproblems[k::4*processes] for k in range(4*processes)]
+    counter = multiprocessing.Value('q', 0)
+    with ProcessPoolExecutor(processes, initializer=_init_clique_worker,
+                             initargs=(adj, counter, bound,
+                                       deadline)) as pool:
+        futures = [pool.submit(_cliques_of_subproblems, chunk)
+                   for chunk in chunks if chunk]
+        cliques = []
+        for future in futures:
+            reason, found = future.result()
+            if reason is not None:
+                for other in futures:
+                    other.cancel()
+                raise _BudgetExceeded(reason)
+            cliques.extend(found)
+    return [[vertices[i] for i in clique] for clique in cliques]
+
+
+def parallel_find_cliques(graph, processes=None, bound=math.inf):
+    """The maximal cliques of a graph, found by a pool of processes
+
+    The vertices are ordered by degeneracy, and the cliques whose first
+    vertex is ``v`` are found by an independent subproblem, involving
+    only the neighbors of ``v``. The subproblems are distributed among
+    the processes.
+
+    Parameters
+    ----------
+    graph : NetworkX graph
+        An undirected graph
+    processes : int
+        Number of processes (by default, the number of processors)
+    bound : int
+        Upper bound for the number of cliques. All the processes stop as
+        soon as, together, they find more cliques.
+
+    Returns
+    -------
+    list
+        The cliques, as lists of vertices, or None if there are more
+        than ``bound`` of them.
+
+    Examples
+    --------
+    >>> import networkx as nx
+    >>> from pycliques.cliques import parallel_find_cliques
+    >>> cliques = parallel_find_cliques(nx.octahedral_graph(), 2)
+    >>> cliques = sorted(sorted(q) for q in cliques)
+    >>> cliques[:4]
+    [[0, 1, 2], [0, 1, 3], [0, 2, 4], [0, 3, 4]]
+    >>> cliques[4:]
+    [[1, 2, 5], [1, 3, 5], [2, 4, 5], [3, 4, 5]]
+    >>> parallel_find_cliques(nx.octahedral_graph(), 2, bound=7) is None
+    True
+
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    try:
+        return _parallel_cliques(graph, processes, bound)
+    except _BudgetExceeded:
+        return None
+
+
+def _clique_edges(cliques, algorithm):
+    """Pairs of indices ``i < j`` such that ``cliques[i]`` and
+    ``cliques[j]`` intersect, in lexicographic order."""
+    if algorithm == "pairs":
+        clique_pairs = itertools.combinations(range(len(cliques)), 2)
+        return ((i, j) for (i, j) in clique_pairs if cliques[i] & cliques[j])
+    elif algorithm == "incidence":
+        return _intersecting_pairs(cliques)
+    else:
+        raise ValueError(f"Unknown algorithm {algorithm}")
+
+
+def _intersecting_pairs(cliques):
+    """Same as ``_clique_edges(cliques, "pairs")``, but a vertex to
+    cliques index is built first, so only cliques sharing some vertex
+    are ever compared.
+    """
+    incidence = dict()
+    for i, clique in enumerate(cliques):
+        for x in clique:
+            incidence.setdefault(x, []).append(i)
+    for i, clique in enumerate(cliques):
+        neighbors = set()
+        for x in clique:
+            neighbors.update(incidence[x])
+        yield from ((i, j) for j in sorted(neighbors) if j > i)
+
+
+def nested_clique(tables, i):
+    """Rebuild a vertex of an iterated clique graph from compact tables
+
+    Parameters
+    ----------
+    tables : list
+        The tables ``[T1, ..., Tn]`` returned by successive calls of
+        ``clique_graph(graph, compact=True)``, where ``T1`` refers to the
+        vertices of the original graph
+    i : int
+        A vertex of the last compact clique graph
+
+    Returns
+    -------
+    Clique
+        The vertex ``i`` as it would appear in the iterated clique graph
+        computed without ``compact``, that is, as a clique of cliques
+        of ... of vertices of the original graph.
+
+    Examples
+    --------
+    >>> import networkx as nx
+    >>> from pycliques.cliques import clique_graph, nested_clique
+    >>> g = nx.octahedral_graph()
+    >>> k, t1 = clique_graph(g, compact=True)
+    >>> k2, t2 = clique_graph(k, compact=True)
+    >>> nested_clique([t1, t2], 0) in clique_graph(clique_graph(g))
+    True
+
+    """
+    *lower, table = tables
+    if not lower:
+        return table.clique(i)
+    return Clique(nested_clique(lower, v) for v in table.clique(i))
+
+
+class CliqueTower(object):
+    """The iterated clique graphs of a graph, computed lazily.
+
+    Iterating over a tower yields the pairs ``(i, K^i(G))``, starting
+    with ``(0, G)``. Only the last level is kept by the tower. After the
+    iteration ends, the attribute ``reason`` tells why it stopped:
+    ``"index"`` if ``max_index`` was reached, or the name of the budget
+    (``"order"``, ``"size"``, ``"bytes"`` or ``"time"``) that the next
+    level would have exceeded. The attribute ``unpared_order`` is the
+    order of the last level before paring. See
+    :func:`iterated_clique_graphs`.
+    """
+    def __init__(self, graph, max_index, pare, compact, max_order, max_size,
+                 max_bytes, timeout, cache, processes):
+        self.graph = graph
+        self.max_index = max_index
+        self.pare = pare
+        self.compact = compact
+        self.max_order = max_order
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.cache = cache
+        self.processes = processes
+        self.table = None
+        self.unpared_order = None
+        self.reason = None
+
+    def __iter__(self):
+        deadline = time.monotonic() + self.timeout
+        graph, self.graph = self.graph, None
+        form = None
+        index = 0
+        self.unpared_order = graph.order()
+        yield index, graph
+        while index < self.max_index:
+            if time.monotonic() > deadline:
+                self.reason = "time"
+                return
+            try:
+                if self.cache is not None:
+                    graph, form, self.unpared_order = self.cache.tower_step(
+                        graph, form, self.pare, self.max_order,
+                        self.max_size, self.max_bytes, deadline,
+                        self.processes)
+                else:
+                    graph = self._step(graph, deadline)
+            except _BudgetExceeded as budget:
+                self.reason = budget.args[0]
+                return
+            index = index+1
+            yield index, graph
+        self.reason = "index"
+
+    def _step(self, graph, deadline):
+        # the cliques are not counted first: the build already stops
+        # after max_order+1 of them
+        graph = _build_clique_graph(graph, compact=self.compact,
+                                    max_order=self.max_order,
+                                    max_size=self.max_size,
+                                    max_bytes=self.max_bytes,
+                                    deadline=deadline,
+                                    processes=self.processes)
+        if self.compact:
+            graph, self.table = graph
+        self.unpared_order = graph.order()
+        if self.pare:
+            graph = completely_pared_graph(graph)
+        return graph
+
+
+def iterated_clique_graphs(graph, max_index=math.inf, pare=True,
+                           compact=False, max_order=math.inf,
+                           max_size=math.inf, max_bytes=math.inf,
+                           timeout=math.inf, cache=None, processes=1):
+    """The iterated clique graphs of a graph, within some budgets
+
+    Parameters
+    ----------
+    graph : NetworkX graph
+        An undirected graph
+    max_index : int
+        The largest index of an iterated clique graph to compute
+    pare : bool
+        Whether to apply ``completely_pared_graph`` after each
+        application of the clique operator
+    compact : bool
+        Whether to compute the clique graphs with ``compact=True``, in
+        which case the table of the last level is kept as the attribute
+        ``table`` of the tower
+    max_order : int
+        Upper bound for the order of each clique graph
+    max_size : int
+        Upper bound for the number of edges of each clique graph
+    max_bytes : int
+        Upper bound for the (estimated) memory used by each clique graph
+    timeout : float
+        Seconds allowed for the whole computation
+    cache : CliqueCache
+        If given, each level is taken from (or stored in) this
+        :class:`pycliques.cache.CliqueCache`, so the levels after the
+        first one are only given up to isomorphism and ``compact`` has
+        no effect. Each level is put in canonical form, which may take
+        much longer than the clique operator on large symmetric levels
+    processes : int
+        Number of processes used to find the cliques of each level
+
+    Returns
+    -------
+    CliqueTower
+        An iterable of pairs ``(i, K^i(graph))``. The levels are computed
+        only when requested, and the tower does not keep the earlier
+        ones. The bounds apply to each clique graph before paring.
+
+    Examples
+    --------
+    >>> import networkx as nx
+    >>> from pycliques.cliques import iterated_clique_graphs
+    >>> tower = iterated_clique_graphs(nx.octahedral_graph(), 2)
+    >>> [k.order() for i, k in tower]
+    [6, 8, 16]
+    >>> tower.reason
+    'index'
+    >>> tower = iterated_clique_graphs(nx.octahedral_graph(), 3, max_order=10)
+    >>> [(i, k.order()) for i, k in tower]
+    [(0, 6), (1, 8)]
+    >>> tower.reason
+    'order'
+
+    """
+    return CliqueTower(graph, max_index, pare, compact, max_order, max_size,
+                       max_bytes, timeout, cache, processes)
+
+
 def _k_coaffine_pair(pair, bound=math.inf):
     """The clique graph of a coaffine pair, as a coaffine pair."""
     g = pair.graph
@@ -117,10 +788,78 @@ def pos_clique(clique_graph, pos, factor=1, bound=math.inf):
     {{0, 1}: array([0.5, 0.5]), {0, 3}: array([ 0.5, -0.5]), {1, 2}: array([-0.5,  0.5]), {2, 3}: array([-0.5, -0.5])}
 
     """
-    posK = dict()
-    for clique in clique_graph:
-        posK[clique] = factor*np.mean([pos[x] for x in clique], axis=0)
-    return posK
+    cliques = list(clique_graph)
+    if not cliques:
+        return dict()
+    vertices = list(pos)
+    ids = {v: i for i, v in enumerate(vertices)}
+    table = CliqueTable(vertices, [[ids[x] for x in q] for q in cliques])
+    coordinates = np.array([pos[v] for v in vertices], dtype=float)
+    return dict(zip(cliques, _barycenters(coordinates, table, factor)))
+
+
+def _barycenters(coordinates, table, factor=1):
+    """The barycenters of the cliques of ``table``, where the row ``j``
+    of ``coordinates`` is the position of the vertex numbered ``j``.
+
+    All the sums are done by a single ``np.add.reduceat`` over the
+    concatenated members of the cliques."""
+    if len(table) == 0:
+        return np.zeros((0,)+coordinates.shape[1:])
+    sizes = np.diff(table.indptr)
+    sums = np.add.reduceat(coordinates[table.indices], table.indptr[:-1],
+                           axis=0)
+    return factor*sums/sizes[:, np.newaxis]
+
+
+def pos_clique_tower(pos, tables, factor=1):
+    """Positions for all the levels of a tower of clique graphs
+
+    Parameters
+    ----------
+    pos : dict
+        The dictionary of positions of vertices of the original graph
+    tables : list
+        The tables ``[T1, ..., Tn]`` of the levels of the tower, as kept
+        by ``iterated_clique_graphs(graph, compact=True)`` in its
+        attribute ``table``, or as returned by successive calls of
+        ``clique_graph(graph, compact=True)``
+    factor : float
+        Factor applied to the positions at each level
+
+    Returns
+    -------
+    list
+        A list of arrays ``[P1, ..., Pn]``, where the row ``j`` of
+        ``Pi`` is the position of the vertex ``j`` of the ``i``-th
+        level, the barycenter of the positions of its clique.
+
+    Examples
+    --------
+    >>> import networkx as nx
+    >>> from pycliques.cliques import iterated_clique_graphs
+    >>> from pycliques.cliques import pos_clique_tower
+    >>> pos = {0: [1, 0], 1: [0, 1], 2: [-1, 0], 3: [0, -1]}
+    >>> tower = iterated_clique_graphs(nx.cycle_graph(4), 2, compact=True)
+    >>> tables = [tower.table for i, k in tower if i > 0]
+    >>> pos_clique_tower(pos, tables)[-1]
+    array([[ 0.5,  0. ],
+           [ 0. ,  0.5],
+           [ 0. , -0.5],
+           [-0.5,  0. ]])
+
+    """
+    levels = []
+    coordinates = None
+    for table in tables:
+        if coordinates is None:
+            rows = [pos[v] for v in table.vertices]
+        else:
+            rows = coordinates[np.asarray(table.vertices, dtype=np.int64)]
+        coordinates = _barycenters(np.asarray(rows, dtype=float), table,
+                                   factor)
+        levels.append(coordinates)
+    return levels
 
 
 def homotopy_clique_graph(graph):
@@ -138,7 +877,24 @@ def homotopy_clique_graph(graph):
 
     Notes
     -----
-    This is the operator :math:`H` defined in [3]_.
+    This is the operator :math:`H` defined in [3]_. Its vertices are the
+    pairs ``(x, q)`` with ``x`` a vertex in the clique ``q``, and
+    ``(x, q)``, ``(y, r)`` are adjacent if ``x`` and ``y`` are both in
+    ``q`` and ``r``. If ``graph`` is a ``CoaffinePair``, so is the result.
+
+    Examples
+    --------
+    >>> import networkx as nx
+    >>> from pycliques.cliques import homotopy_clique_graph
+    >>> from pycliques.coaffinations import CoaffinePair
+    >>> h = homotopy_clique_graph(nx.octahedral_graph())
+    >>> h.order(), h.size()
+    (24, 84)
+    >>> sigma = {0: 5, 5: 0, 1: 3, 3: 1, 2: 4, 4: 2}
+    >>> coaffine = CoaffinePair(nx.octahedral_graph(), sigma)
+    >>> pair = homotopy_clique_graph(coaffine)
+    >>> pair.graph.order()
+    24
 
     References
     ----------
@@ -147,12 +903,34 @@ def homotopy_clique_graph(graph):
        29(1), (2008) pp. 334-342.
     """
 
-    def _ady(c1, c2):
-        return (c1[0] in c2[1]) and (c2[0] in c1[1])
-    H = nx.Graph()
+    if isinstance(graph, CoaffinePair):
+        return _h_coaffine_pair(graph)
     cliques = [Clique(q) for q in nx.find_cliques(graph)]
-    vertices = [(x, q) for x in graph.nodes() for q in cliques if x in q]
-    H.add_nodes_from(vertices)
-    vertex_pairs = itertools.combinations(vertices, 2)
-    H.add_edges_from((c1, c2) for (c1, c2) in vertex_pairs if _ady(c1, c2))
+    incidence = dict()
+    for q in cliques:
+        for x in q:
+            incidence.setdefault(x, []).append(q)
+    H = nx.Graph()
+    H.add_nodes_from((x, q) for x in graph.nodes() for q in incidence[x])
+    # (x, q) and (y, r) are adjacent if and only if x and y are both in
+    # the intersection of q and r
+    for q in cliques:
+        H.add_edges_from(((x, q), (y, q))
+                         for (x, y) in itertools.combinations(q, 2))
+    for (i, j) in _intersecting_pairs(cliques):
+        q, r = cliques[i], cliques[j]
+        common = q & r
+        H.add_edges_from(((x, q), (y, r)) for x in common for y in common)
     return H
+
+
+def _h_coaffine_pair(pair):
+    """The homotopy clique graph of a coaffine pair, as a coaffine
+    pair."""
+    g = pair.graph
+    sigma = pair.coaffination
+    hg = homotopy_clique_graph(g)
+    coaf_h = dict([])
+    for (x, q) in hg:
+        coaf_h[(x, q)] = (sigma[x], Clique([sigma[y] for y in q]))
+    return CoaffinePair(hg, coaf_h)
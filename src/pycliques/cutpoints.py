@@ -4,7 +4,7 @@ open neighborhood :math:`N_{G}(x)` is not connected.
 """
 
 import networkx as nx
-from pycliques.surfaces import open_neighborhood
+from pycliques.dominated import NeighborhoodIndex
 
 
 def local_cutpoints(graph):
@@ -23,8 +23,13 @@ def local_cutpoints(graph):
       [1, 2]
 
     """
-    for v in graph:
-        if not nx.is_connected(open_neighborhood(graph, v)):
+    index = NeighborhoodIndex(graph)
+    for i, v in enumerate(index.vertices):
+        neighbors = index.open(i)
+        if not neighbors:
+            raise nx.NetworkXPointlessConcept(
+                "Connectivity is undefined for the null graph.")
+        if not index.is_connected(neighbors):
             yield v
 
 
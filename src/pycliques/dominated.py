@@ -8,10 +8,134 @@ neighbors of its ends is dismantlable.
 
 """
 import copy
+import heapq
 
+import networkx as nx
+
+from pycliques.canonical import canonical_form
 from pycliques.surfaces import open_neighborhood
 
 
+def _bits(mask):
+    """The positions of the bits set in ``mask``, in increasing order"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length()-1
+        mask = mask ^ low
+
+
+class NeighborhoodIndex(object):
+    """Closed neighborhoods of the vertices of a graph, as bit masks
+
+    The vertices are numbered following the order of the graph, and a
+    set of vertices is stored as a Python integer whose bit ``i`` is set
+    if the vertex numbered ``i`` is in the set. Then ``u`` dominates
+    ``v`` if and only if ``closed[v] & ~closed[u] == 0``, and the
+    dominators of ``v`` are the common neighbors of all the vertices in
+    the closed neighborhood of ``v``. Vertices may be removed, which
+    updates the masks of their neighbors.
+
+    Args:
+      graph (networkx.classes.graph.Graph): graph
+
+    Example:
+      >>> import networkx as nx
+      >>> from pycliques.dominated import NeighborhoodIndex
+      >>> index = NeighborhoodIndex(nx.path_graph(4))
+      >>> index.members(index.closed[1])
+      [0, 1, 2]
+      >>> index.dominator(0), index.dominator(1)
+      (1, None)
+      >>> index.remove(0)
+      >>> index.dominator(1)
+      2
+
+    """
+    def __init__(self, graph):
+        self.vertices = list(graph)
+        self.ids = {v: i for i, v in enumerate(self.vertices)}
+        self.closed = []
+        for i, v in enumerate(self.vertices):
+            mask = 1 << i
+            for u in graph[v]:
+                mask = mask | (1 << self.ids[u])
+            self.closed.append(mask)
+        self.alive = (1 << len(self.vertices))-1
+
+    def mask(self, vertices):
+        """The mask of a collection of vertices"""
+        mask = 0
+        for v in vertices:
+            mask = mask | (1 << self.ids[v])
+        return mask
+
+    def members(self, mask):
+        """The list of vertices in ``mask``, in the order of the graph"""
+        return [self.vertices[i] for i in _bits(mask)]
+
+    def open(self, i):
+        """The mask of the open neighborhood of the vertex numbered i"""
+        return self.closed[i] & ~(1 << i)
+
+    def dominates(self, v, w):
+        """Whether the vertex v dominates w"""
+        return self.closed[self.ids[w]] & ~self.closed[self.ids[v]] == 0
+
+    def dominators(self, i):
+        """The mask of the vertices dominating the vertex numbered i"""
+        bit = 1 << i
+        common = self.closed[i]
+        for j in _bits(self.closed[i]):
+            common = common & self.closed[j]
+            if common == bit:
+                return 0
+        return common & ~bit
+
+    def dominator(self, v):
+        """The first vertex dominating v, or None"""
+        dominators = self.dominators(self.ids[v])
+        if not dominators:
+            return None
+        return self.vertices[(dominators & -dominators).bit_length()-1]
+
+    def remove(self, v):
+        """Remove the vertex v"""
+        i = self.ids[v]
+        bit = 1 << i
+        for j in _bits(self.open(i)):
+            self.closed[j] = self.closed[j] & ~bit
+        self.closed[i] = 0
+        self.alive = self.alive & ~bit
+
+    def remove_edge(self, v, w):
+        """Remove the edge between the vertices v and w"""
+        i, j = self.ids[v], self.ids[w]
+        self.closed[i] = self.closed[i] & ~(1 << j)
+        self.closed[j] = self.closed[j] & ~(1 << i)
+
+    def is_complete(self, mask):
+        """Whether the vertices in ``mask`` are pairwise adjacent"""
+        for i in _bits(mask):
+            if mask & ~self.closed[i]:
+                return False
+        return True
+
+    def is_connected(self, mask):
+        """Whether the subgraph induced by ``mask`` is connected. The
+        empty subgraph is considered connected."""
+        if not mask:
+            return True
+        reached = mask & -mask
+        frontier = reached
+        while frontier:
+            grown = 0
+            for i in _bits(frontier):
+                grown = grown | self.closed[i]
+            frontier = grown & mask & ~reached
+            reached = reached | frontier
+        return reached == mask
+
+
 def closed_neighborhood(graph, v):
     """The closed neighborhood of a vertex in a graph
 
@@ -73,15 +197,18 @@ def is_dominated_vertex(graph, v, return_dominator=False):
       False
 
     """
-    for u in graph:
-        if u != v:
-            if dominates(graph, u, v):
-                if return_dominator:
-                    return (True, u)
-                else:
-                    return True
-    else:
+    # the dominators of v are the common neighbors of the vertices in
+    # its closed neighborhood
+    neighborhood = closed_neighborhood(graph, v)
+    candidates = set(neighborhood)
+    for w in neighborhood:
+        candidates.intersection_update(closed_neighborhood(graph, w))
+    candidates.discard(v)
+    if not candidates:
         return False
+    if return_dominator:
+        return (True, next(u for u in graph if u in candidates))
+    return True
 
 
 def has_dominated_vertex(graph):
@@ -103,9 +230,9 @@ def has_dominated_vertex(graph):
       False
 
     """
-
-    for v in graph:
-        if is_dominated_vertex(graph, v):
+    index = NeighborhoodIndex(graph)
+    for i, v in enumerate(index.vertices):
+        if index.dominators(i):
             return [v]
     else:
         return False
@@ -142,44 +269,92 @@ def remove_dominated_vertex(graph):
 
 
 def twin_classes(graph):
-    classes = []
-    for vertex in graph.nodes():
-        isit = is_dominated_vertex(graph, vertex, return_dominator=True)
-        if isit:
-            dominator = isit[1]
-            if dominates(graph, vertex, dominator):
-                for aclass in classes:
-                    if dominator in aclass:
-                        if vertex not in aclass:
-                            aclass.append(vertex)
-                        break
-                else:
-                    classes.append([vertex, dominator])
-            else:
-                classes.append([vertex])
-        else:
-            classes.append([vertex])
-    return classes
+    """The classes of twin vertices of a graph
+
+    Two vertices are *twins* if they have the same closed neighborhood.
+    The classes are found by hashing the closed neighborhoods.
+
+    Args:
+      graph (networkx.classes.graph.Graph): graph
+
+    Returns:
+      A list with the classes of twins, each one as a list. The classes
+      are sorted by their first vertex, and each class is in the order
+      of the graph.
+
+    Example:
+      >>> import networkx as nx
+      >>> from pycliques.dominated import twin_classes
+      >>> twin_classes(nx.path_graph(4))
+      [[0], [1], [2], [3]]
+      >>> twin_classes(nx.complete_multipartite_graph(1, 2, 1))
+      [[0, 3], [1], [2]]
+
+    """
+    classes = dict()
+    for v in graph:
+        key = frozenset(graph[v]) | {v}
+        classes.setdefault(key, []).append(v)
+    return list(classes.values())
 
 
 def pared_graph(graph):
-    twins = twin_classes(graph)
-    reps1 = [aclass[0] for aclass in twins if len(aclass) == 1]
-    reps2 = [aclass[0] for aclass in twins if len(aclass) > 1]
-    notdom = [vertex for vertex in reps1 if
-              not is_dominated_vertex(graph, vertex)]
-    notdom.extend(reps2)
-    return graph.subgraph(notdom)
+    """The pared graph of a graph
+
+    Only the first vertex of each class of twins is kept, and a vertex
+    without twins is removed if it is dominated by another vertex.
+
+    Args:
+      graph (networkx.classes.graph.Graph): graph
+
+    Returns:
+      The pared graph, as a subgraph view of graph
+
+    Example:
+      >>> import networkx as nx
+      >>> from pycliques.dominated import pared_graph
+      >>> list(pared_graph(nx.path_graph(5)).nodes())
+      [1, 2, 3]
+
+    """
+    index = NeighborhoodIndex(graph)
+    kept = []
+    for aclass in twin_classes(graph):
+        v = index.ids[aclass[0]]
+        if len(aclass) > 1 or not index.dominators(v) & ~index.mask(aclass):
+            kept.append(aclass[0])
+    return graph.subgraph(kept)
 
 
 def pared_index(graph, return_cp=False):
+    """The number of times that the pared graph must be taken until it
+    stops changing
+
+    Args:
+      graph (networkx.classes.graph.Graph): graph
+      return_cp (bool): whether to return the last pared graph too
+
+    Returns:
+      The pared index, or a pair with the pared index and the last
+      pared graph (a subgraph view of graph) if ``return_cp`` is True
+
+    Example:
+      >>> import networkx as nx
+      >>> from pycliques.dominated import pared_index
+      >>> pared_index(nx.path_graph(6))
+      3
+      >>> pared_index(nx.cycle_graph(5), return_cp=True)[1].order()
+      5
+
+    """
     pi = 0
-    g1 = copy.deepcopy(graph)
+    g1 = graph
     while True:
         n = g1.order()
         g1 = pared_graph(g1)
         if n != g1.order():
             pi = pi+1
+            g1 = graph.subgraph(g1.nodes())
         else:
             if return_cp:
                 return (pi, g1)
@@ -204,12 +379,139 @@ def completely_pared_graph(graph):
       [3]
 
     """
-    g1 = copy.deepcopy(graph)
-    while True:
-        n = g1.order()
-        g1 = remove_dominated_vertex(g1)
-        if n == g1.order():
-            return g1
+    g1 = graph.copy()
+    for _ in _remove_dominated_vertices(g1):
+        pass
+    return g1
+
+
+def _remove_dominated_vertices(graph):
+    """Remove from ``graph`` (in place) dominated vertices one at a time,
+    each time the first one in the order of the vertices, as
+    ``remove_dominated_vertex`` would, and yield the pairs ``(v, u)``
+    of a removed vertex and a vertex dominating it.
+
+    Removing ``x`` only changes the closed neighborhoods of the
+    neighbors of ``x``, so only those can become dominated. Hence a
+    vertex found not dominated is checked again only after one of its
+    neighbors is removed.
+    """
+    index = NeighborhoodIndex(graph)
+    pending = list(range(len(index.vertices)))
+    queued = set(pending)
+    while pending:
+        i = heapq.heappop(pending)
+        queued.discard(i)
+        dominators = index.dominators(i)
+        if not dominators:
+            continue
+        v = index.vertices[i]
+        dominator = index.vertices[(dominators & -dominators).bit_length()-1]
+        neighbors = index.open(i)
+        index.remove(v)
+        graph.remove_node(v)
+        for j in _bits(neighbors):
+            if j not in queued:
+                heapq.heappush(pending, j)
+                queued.add(j)
+        yield v, dominator
+
+
+def dismantling_order(graph):
+    """The dominated vertices removed by :func:`completely_pared_graph`
+
+    Args:
+      graph (networkx.classes.graph.Graph): graph
+
+    Returns:
+      The list of pairs ``(v, u)``, in order of removal, of a removed
+      vertex ``v`` and a vertex ``u`` that dominates it at that moment.
+      The graph is dismantlable if and only if the list has
+      ``graph.order()-1`` pairs. The list is a certificate that can be
+      checked with :func:`verify_dismantling`.
+
+    Example:
+      >>> import networkx as nx
+      >>> from pycliques.dominated import dismantling_order
+      >>> dismantling_order(nx.path_graph(4))
+      [(0, 1), (1, 2), (2, 3)]
+      >>> dismantling_order(nx.cycle_graph(4))
+      []
+
+    """
+    return list(_remove_dominated_vertices(graph.copy()))
+
+
+def verify_dismantling(graph, certificate, complete=True):
+    """Checks a certificate given by :func:`dismantling_order`
+
+    Each pair is checked once, against the closed neighborhoods of the
+    graph left by the previous removals, so this takes time linear in
+    the size of the graph.
+
+    Args:
+      graph (networkx.classes.graph.Graph): graph
+      certificate: sequence of pairs ``(v, u)`` of vertices
+      complete (bool): whether the removals must leave a single vertex
+
+    Returns:
+      True if in each pair ``(v, u)``, ``v`` is dominated by ``u`` after
+      the removal of the vertices of the previous pairs (and, if
+      ``complete`` is True, only one vertex is left), False otherwise.
+
+    Example:
+      >>> import networkx as nx
+      >>> from pycliques.dominated import verify_dismantling
+      >>> verify_dismantling(nx.path_graph(4), [(0, 1), (1, 2), (2, 3)])
+      True
+      >>> verify_dismantling(nx.path_graph(4), [(1, 2), (0, 2), (2, 3)])
+      False
+      >>> verify_dismantling(nx.path_graph(4), [(0, 1)], complete=False)
+      True
+
+    """
+    closed = {v: set(graph[v]) | {v} for v in graph}
+    for v, u in certificate:
+        if v == u or v not in closed or u not in closed:
+            return False
+        neighborhood = closed.pop(v)
+        if not neighborhood <= closed[u]:
+            return False
+        for w in neighborhood:
+            if w != v:
+                closed[w].discard(v)
+    return len(closed) == 1 or not complete
+
+
+def dismantling_retraction(graph, certificate):
+    """The retraction given by a sequence of removals of dominated vertices
+
+    Mapping each removed vertex to its dominator is a retraction, so
+    composing them gives a retraction of the graph to the subgraph
+    induced by the vertices that were not removed.
+
+    Args:
+      graph (networkx.classes.graph.Graph): graph
+      certificate: sequence of pairs ``(v, u)``, as the one given by
+        :func:`dismantling_order`
+
+    Returns:
+      A dictionary that maps each vertex of graph to a vertex that was
+      not removed.
+
+    Example:
+      >>> import networkx as nx
+      >>> from pycliques.dominated import dismantling_order
+      >>> from pycliques.dominated import dismantling_retraction
+      >>> g = nx.path_graph(4)
+      >>> dismantling_retraction(g, dismantling_order(g))
+      {0: 3, 1: 3, 2: 3, 3: 3}
+
+    """
+    image = {v: v for v in graph}
+    for v, u in reversed(certificate):
+        image[v] = image[u]
+    return image
 
 
 def is_dismantlable(graph):
@@ -230,7 +532,47 @@ def is_dismantlable(graph):
       False
 
     """
-    return completely_pared_graph(graph).order() == 1
+    return graph.order() > 0 and \
+        len(dismantling_order(graph)) == graph.order()-1
+
+
+def _dismantles(closed, mask):
+    """Whether the subgraph induced by the vertices in ``mask`` is
+    dismantlable, where ``closed`` is the list of masks of the closed
+    neighborhoods. Nothing is copied besides the masks of the vertices
+    of the subgraph. The order of removal does not change whether a
+    graph is dismantlable, so any dominated vertex is removed."""
+    local = {i: closed[i] & mask for i in _bits(mask)}
+    pending = list(local)
+    while pending and len(local) > 1:
+        i = pending.pop()
+        if i not in local:
+            continue
+        bit = 1 << i
+        common = local[i]
+        for j in _bits(local[i]):
+            common = common & local[j]
+        if common & ~bit:
+            for j in _bits(local.pop(i) & ~bit):
+                local[j] = local[j] & ~bit
+                pending.append(j)
+    return len(local) == 1
+
+
+def _cached_dismantles(closed, mask, cache):
+    """Same as ``_dismantles``, but the verdicts are kept in the
+    dictionary ``cache`` (if it is not None), keyed by the canonical
+    form of the subgraph."""
+    if cache is None:
+        return _dismantles(closed, mask)
+    subgraph = nx.Graph()
+    subgraph.add_nodes_from(_bits(mask))
+    subgraph.add_edges_from((i, j) for i in _bits(mask)
+                            for j in _bits(closed[i] & mask) if i < j)
+    key = canonical_form(subgraph)
+    if key not in cache:
+        cache[key] = _dismantles(closed, mask)
+    return cache[key]
 
 
 def is_s_dismantlable_vertex(graph, v):
@@ -277,8 +619,9 @@ def has_s_dismantlable_vertex(graph):
       False
 
     """
-    for v in graph:
-        if is_s_dismantlable_vertex(graph, v):
+    index = NeighborhoodIndex(graph)
+    for i, v in enumerate(index.vertices):
+        if _dismantles(index.closed, index.open(i)):
             return [v]
     else:
         return False
@@ -312,11 +655,20 @@ def remove_s_dismantlable_vertex(graph):
         return graph_aux
 
 
-def complete_s_collapse(graph):
+def complete_s_collapse(graph, cache=None):
     """Successively remove all s-dismantlable vertices from a graph
 
+    Each time, the first s-dismantlable vertex is removed. Removing a
+    vertex only changes the open neighborhoods of its neighbors, so only
+    those are examined again.
+
     Args:
       graph (networkx.classes.graph.Graph): graph
+      cache (dict): if given, the dismantlability of the neighborhoods is
+        kept here, keyed by their canonical forms, and can be shared
+        between calls. Computing a canonical form costs more than
+        dismantling a small neighborhood, so this pays off only when
+        many large neighborhoods are isomorphic.
 
     Returns:
       A graph obtained by successively removing s-dismantlable vertices
@@ -327,14 +679,29 @@ def complete_s_collapse(graph):
       >>> g1 = complete_s_collapse(nx.circulant_graph(7, [1, 2]))
       >>> list(g1.nodes())
       [1, 3, 5, 6]
+      >>> cache = dict()
+      >>> list(complete_s_collapse(nx.circulant_graph(7, [1, 2]), cache))
+      [1, 3, 5, 6]
 
     """
-    graph_aux = copy.deepcopy(graph)
-    while True:
-        n = graph_aux.order()
-        graph_aux = remove_s_dismantlable_vertex(graph_aux)
-        if n == graph_aux.order():
-            return graph_aux
+    graph_aux = graph.copy()
+    index = NeighborhoodIndex(graph_aux)
+    pending = list(range(len(index.vertices)))
+    queued = set(pending)
+    while pending:
+        i = heapq.heappop(pending)
+        queued.discard(i)
+        neighbors = index.open(i)
+        if not _cached_dismantles(index.closed, neighbors, cache):
+            continue
+        v = index.vertices[i]
+        index.remove(v)
+        graph_aux.remove_node(v)
+        for j in _bits(neighbors):
+            if j not in queued:
+                heapq.heappush(pending, j)
+                queued.add(j)
+    return graph_aux
 
 
 def is_s_dismantlable_edge(graph, e):
@@ -356,7 +723,7 @@ def is_s_dismantlable_edge(graph, e):
       False
 
     """
-    inter = graph.subgraph(set(graph[e[0]]).intersection(graph[e[1]])).copy()
+    inter = graph.subgraph(set(graph[e[0]]).intersection(graph[e[1]]))
     return is_dismantlable(inter)
 
 
@@ -379,8 +746,10 @@ def has_s_dismantlable_edge(graph):
       False
 
     """
+    index = NeighborhoodIndex(graph)
     for e in graph.edges():
-        if is_s_dismantlable_edge(graph, e):
+        i, j = index.ids[e[0]], index.ids[e[1]]
+        if _dismantles(index.closed, index.open(i) & index.open(j)):
             return e
     else:
         return False
@@ -414,11 +783,19 @@ def remove_s_dismantlable_edge(graph):
         return graph_aux
 
 
-def complete_s_collapse_edges(graph):
+def complete_s_collapse_edges(graph, cache=None):
     """Successively remove all s-dismantlable edges from a graph
 
+    Each time, the first s-dismantlable edge is removed. Removing the
+    edge ``uv`` only changes the common neighbors of the edges incident
+    to ``u`` or ``v``, and the subgraphs induced by the common neighbors
+    of the edges between common neighbors of ``u`` and ``v``, so only
+    those edges are examined again.
+
     Args:
       graph (networkx.classes.graph.Graph): graph
+      cache (dict): if given, the dismantlability of the subgraphs is
+        kept here, as in :func:`complete_s_collapse`
 
     Returns:
       A graph obtained by succesively removing s-dismantlable edges
@@ -431,9 +808,35 @@ def complete_s_collapse_edges(graph):
       [(0, 3), (1, 3), (2, 3)]
 
     """
-    graph_aux = copy.deepcopy(graph)
-    while True:
-        n = graph_aux.size()
-        graph_aux = remove_s_dismantlable_edge(graph_aux)
-        if n == graph_aux.size():
-            return graph_aux
+    graph_aux = graph.copy()
+    index = NeighborhoodIndex(graph_aux)
+    ids = index.ids
+    # removing edges does not change the order of the remaining ones
+    edges = [(ids[u], ids[v]) for (u, v) in graph_aux.edges()]
+    position = {frozenset(e): k for k, e in enumerate(edges)}
+    pending = list(range(len(edges)))
+    queued = set(pending)
+
+    def requeue(i, j):
+        k = position[frozenset((i, j))]
+        if k not in queued:
+            heapq.heappush(pending, k)
+            queued.add(k)
+
+    while pending:
+        k = heapq.heappop(pending)
+        queued.discard(k)
+        i, j = edges[k]
+        common = index.open(i) & index.open(j)
+        if not _cached_dismantles(index.closed, common, cache):
+            continue
+        index.remove_edge(index.vertices[i], index.vertices[j])
+        graph_aux.remove_edge(index.vertices[i], index.vertices[j])
+        for a in (i, j):
+            for b in _bits(index.open(a)):
+                requeue(a, b)
+        for a in _bits(common):
+            for b in _bits(index.open(a) & common):
+                if a < b:
+                    requeue(a, b)
+    return graph_aux
@@ -6,7 +6,11 @@ A collection :math:`\mathcal{C}` of subsets of a set :math:`X` is called
 :math:`\mathcal{C}` has non empty intersection. A graph is called *Helly*
 if the collection of its cliques is Helly.
 """
-from pycliques.dominated import is_dismantlable
+import math
+
+import networkx as nx
+
+from pycliques.dominated import NeighborhoodIndex, _bits, is_dismantlable
 
 
 def n_closed(graph, edge):
@@ -67,16 +71,118 @@ def is_clique_helly(graph):
        103(1), 40–43 (2007).
 
     """
-    edges = graph.edges()
-    uclosed = u_closed_dict(graph)
-    for e in edges:
-        for v in n_open(graph, e):
-            gooda = (e[0], v) if (e[0], v) in uclosed else (v, e[0])
-            goodb = (e[1], v) if (e[1], v) in uclosed else (v, e[1])
-            Sc = uclosed[gooda] & uclosed[goodb]
-            if len(Sc & uclosed[e]) == 0:
-                return False
-    return True
+    return non_helly_triangle(graph) is None
+
+
+def _universal(closed, mask):
+    """The vertices of ``mask`` adjacent to all the other vertices of
+    ``mask``"""
+    return sum(1 << w for w in _bits(mask) if mask & ~closed[w] == 0)
+
+
+def _non_helly_triangle(closed):
+    """The engine of :func:`non_helly_triangle`, on the list ``closed``
+    of masks of closed neighborhoods. Returns a triple of numbers of
+    vertices, or None."""
+    universal = dict()
+
+    def u_closed_mask(x, y):
+        if (x, y) not in universal:
+            universal[(x, y)] = _universal(closed, closed[x] & closed[y])
+        return universal[(x, y)]
+
+    for a in range(len(closed)):
+        for b in _bits(closed[a] >> (a+1)):
+            b = b+a+1
+            for c in _bits((closed[a] & closed[b]) >> (b+1)):
+                c = c+b+1
+                if not (u_closed_mask(a, b) & u_closed_mask(a, c) &
+                        u_closed_mask(b, c)):
+                    return (a, b, c)
+    return None
+
+
+def non_helly_triangle(graph):
+    """A witness that a graph is not clique-Helly
+
+    Parameters
+    ----------
+    graph : NetworkX graph
+
+    Returns
+    -------
+    tuple
+       A triangle ``(a, b, c)`` such that no vertex is adjacent or equal
+       to all the common neighbors of each pair of vertices of the
+       triangle, or None if there is none, that is, if the graph is
+       clique-Helly [1]_. Each triangle is examined once.
+
+    Examples
+    --------
+    >>> import networkx as nx
+    >>> from pycliques.helly import non_helly_triangle
+    >>> non_helly_triangle(nx.octahedral_graph())
+    (0, 1, 2)
+    >>> non_helly_triangle(nx.cycle_graph(3)) is None
+    True
+
+    """
+    index = NeighborhoodIndex(graph)
+    triangle = _non_helly_triangle(index.closed)
+    if triangle is None:
+        return None
+    return tuple(index.vertices[i] for i in triangle)
+
+
+def is_clique_graph_helly(graph, bound=math.inf):
+    """Checks whether the clique graph of a graph is Helly
+
+    The clique graph is not built: two cliques are adjacent when they
+    share a vertex, so the closed neighborhood of a clique, as a mask of
+    numbers of cliques, is the union of the masks of the cliques that
+    contain each of its vertices. The test of :func:`is_clique_helly`
+    is then run on those masks.
+
+    Parameters
+    ----------
+    graph : NetworkX graph
+    bound : int
+       Upper bound for the number of cliques of graph
+
+    Returns
+    -------
+    bool
+       True if the clique graph of graph is Helly, False otherwise, and
+       None if graph has more than ``bound`` cliques
+
+    Examples
+    --------
+    >>> import networkx as nx
+    >>> from pycliques.helly import is_clique_graph_helly
+    >>> is_clique_graph_helly(nx.octahedral_graph())
+    False
+    >>> is_clique_graph_helly(nx.triangular_lattice_graph(3, 3))
+    True
+    >>> is_clique_graph_helly(nx.octahedral_graph(), bound=7) is None
+    True
+
+    """
+    cliques = []
+    for clique in nx.find_cliques(graph):
+        cliques.append(clique)
+        if len(cliques) > bound:
+            return None
+    containing = dict()
+    for i, clique in enumerate(cliques):
+        for x in clique:
+            containing[x] = containing.get(x, 0) | (1 << i)
+    closed = []
+    for clique in cliques:
+        mask = 0
+        for x in clique:
+            mask = mask | containing[x]
+        closed.append(mask)
+    return _non_helly_triangle(closed) is None
 
 
 def is_hereditary_clique_helly(graph):
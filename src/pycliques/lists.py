@@ -6,7 +6,10 @@ includes the data for connected graphs from 6 to 10 vertices.
 
 """
 
+import itertools
+
 import networkx as nx
+import numpy as np
 import pkg_resources
 import gzip
 
@@ -60,6 +63,79 @@ def graph_generator(n, connected=True):
             yield graph
 
 
+def graph6_to_adjacency(lines):
+    """Adjacency matrices of graphs of the same order in graph6 format
+
+    All the graphs are decoded at once, with array operations.
+
+    Args:
+        lines (list): graph6 strings (as bytes, without header or
+            newline) of graphs of the same order, at most 62
+
+    Returns:
+        numpy.ndarray: A boolean array of shape ``(len(lines), n, n)``
+        with the adjacency matrices of the graphs.
+
+    Examples:
+        >>> from pycliques.lists import graph6_to_adjacency
+        >>> adjacency = graph6_to_adjacency([b"Bw", b"B_"])
+        >>> adjacency.shape
+        (2, 3, 3)
+        >>> adjacency[1].astype(int)
+        array([[0, 1, 0],
+               [1, 0, 0],
+               [0, 0, 0]])
+    """
+    data = np.frombuffer(b"".join(lines), dtype=np.uint8)
+    data = data.reshape(len(lines), -1)-63
+    n = int(data[0, 0])
+    if np.any(data[:, 0] != n):
+        raise ValueError("all the graphs must have the same order")
+    bits = np.unpackbits(data[:, 1:, np.newaxis], axis=2)[:, :, 2:]
+    bits = bits.reshape(len(lines), -1)[:, :n*(n-1)//2].astype(bool)
+    # graph6 lists the upper triangle column by column
+    j, i = np.tril_indices(n, -1)
+    adjacency = np.zeros((len(lines), n, n), dtype=bool)
+    adjacency[:, i, j] = bits
+    adjacency[:, j, i] = bits
+    return adjacency
+
+
+def adjacency_chunks(n, connected=True, size=4096):
+    """
+    Yields the graphs of a g6.gz file as adjacency tensors, in chunks.
+
+    Only one chunk is kept in memory at a time.
+
+    Args:
+        n (int): Order of the graphs (number of nodes). Supported: 6 to 10.
+        connected (bool): If True, reads connected graphs file; else,
+            reads all graphs file. Defaults to True.
+        size (int): Number of graphs in each chunk.
+
+    Yields:
+        numpy.ndarray: A boolean array of shape ``(k, n, n)``, with
+        ``k <= size``, see :func:`graph6_to_adjacency`.
+
+    Examples:
+        >>> from pycliques.lists import adjacency_chunks
+        >>> [chunk.shape for chunk in adjacency_chunks(6, size=100)]
+        [(100, 6, 6), (12, 6, 6)]
+    """
+    if connected:
+        the_dict = _dict_connected
+    else:
+        the_dict = _dict_all
+
+    with gzip.open(the_dict[n], 'rb') as graph_file:
+        lines = (line.strip() for line in graph_file)
+        while True:
+            chunk = list(itertools.islice(lines, size))
+            if not chunk:
+                return
+            yield graph6_to_adjacency(chunk)
+
+
 def list_graphs(n, connected=True):
     """List of connected graphs of a given order, from B. McKay data
 
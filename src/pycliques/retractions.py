@@ -1,17 +1,21 @@
 import networkx as nx
 from networkx.algorithms import isomorphism
 
+import itertools
 import logging
 import argparse
+import math
+import multiprocessing
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
 from pycliques import __version__
-from pycliques.dominated import closed_neighborhood, completely_pared_graph
-from pycliques.cliques import clique_graph
+from pycliques.cliques import iterated_clique_graphs, _BudgetExceeded
 from pycliques.named import suspension_of_cycle, complement_of_cycle, \
     octahedron
 from pycliques.utilities import dict_to_tuple, invert_dict
-from pycliques.coaffinations import automorphisms
+from pycliques.canonical import automorphism_generators
 
 
 _logger = logging.getLogger(__name__)
@@ -29,6 +33,14 @@ def _parse_args(args):
         help="index of clique graph",
         type=int,
         metavar="INT")
+    parser.add_argument(
+        '-p',
+        '--processes',
+        dest="processes",
+        help="number of processes used to find cliques and retractions",
+        type=int,
+        default=1,
+        metavar="INT")
     parser.add_argument(
         '-v',
         '--verbose',
@@ -97,42 +109,232 @@ def is_map(domain, codomain, ismap):
         return True
 
 
-def _extension_of_map(large, small, mapp, v):
-    """Given the graphs ``large``, ``small``, a (partial) map ``mapp``
-    between them, and a vertex ``v`` of the graph ``large``, this
-    function returns the set of vertices of the graph ``small`` that
-    could be images of ``v`` under ``mapp``.
-    """
-    common = set(small.nodes())
-    for w in large[v] & mapp.keys():
-        common = common & closed_neighborhood(small, mapp[w])
-    return common
-
-
-def _extend_retraction(large, small, state):
+def _extend_retraction(large, small, state, search=None):
     """We are given the graphs ``large`` and ``small``. Here ``state`` is
     a tuple of pairs, that defines a (partial) map from ``large`` to
     ``small``. This function uses backtracking to complete a
-    retraction from ``large`` to ``small``.
+    retraction from ``large`` to ``small``, and yields each completion
+    once, as a tuple of pairs in the order of the vertices of ``large``.
+
+    The possible images of each unassigned vertex are kept as a bit
+    mask over the vertices of ``small``, and each assignment removes
+    from the masks of the unassigned neighbors the vertices not
+    adjacent or equal to the image. The next vertex assigned is one
+    with fewest possible images, and the changes to the masks are kept
+    in a trail, so they are undone when backtracking without copying
+    anything. If ``search`` (a ``_Search``) is given, it counts the
+    assignments and backtracks, and may stop the search.
     """
+    targets = list(small)
+    ids = {w: j for j, w in enumerate(targets)}
+    closed = [sum(1 << ids[u] for u in small[w]) | (1 << ids[w])
+              for w in targets]
     ret = dict(state)
-    remaining = list(large.nodes()-ret.keys())
-    _logger.info("Remaining: {}".format(remaining))
-    for v in remaining:
-        for w in _extension_of_map(large, small, ret, v):
-            if len(ret) == len(large)-1:
-                yield ((v, w),)
+    free = [v for v in large if v not in ret]
+    position = {v: i for i, v in enumerate(free)}
+    domain = [(1 << len(targets))-1]*len(free)
+    neighbors = []
+    for i, v in enumerate(free):
+        neighbors.append([position[u] for u in large[v] if u in position])
+        for u in large[v]:
+            if u in ret:
+                domain[i] = domain[i] & closed[ids[ret[u]]]
+        if not domain[i]:
+            return
+    value = [None]*len(free)
+    unassigned = set(range(len(free)))
+    trail = []
+    stack = []
+
+    def push():
+        i = min(unassigned, key=lambda k: (bin(domain[k]).count("1"), k))
+        unassigned.remove(i)
+        stack.append([i, domain[i], len(trail)])
+
+    if not free:
+        yield ()
+        return
+    push()
+    while stack:
+        frame = stack[-1]
+        i, candidates, mark = frame
+        while len(trail) > mark:
+            k, old = trail.pop()
+            domain[k] = old
+        if not candidates:
+            value[i] = None
+            unassigned.add(i)
+            stack.pop()
+            if search is not None:
+                search.stats.backtracks = search.stats.backtracks+1
+            continue
+        if search is not None and search.node(len(stack)):
+            return
+        low = candidates & -candidates
+        frame[1] = candidates ^ low
+        j = low.bit_length()-1
+        value[i] = j
+        for k in neighbors[i]:
+            if value[k] is None:
+                restricted = domain[k] & closed[j]
+                if restricted != domain[k]:
+                    trail.append((k, domain[k]))
+                    domain[k] = restricted
+                if not restricted:
+                    break
+        else:
+            if unassigned:
+                push()
             else:
-                for res in _extend_retraction(large, small, state+((v, w),)):
-                    yield ((v, w),)+res
+                yield tuple((v, targets[value[k]])
+                            for k, v in enumerate(free))
+
+
+def _orbit(vertices, generators):
+    """The orbit of a frozenset of vertices under the group generated by
+    ``generators``"""
+    orbit = {vertices}
+    frontier = [vertices]
+    while frontier:
+        new = []
+        for image in frontier:
+            for gamma in generators:
+                moved = frozenset(gamma[x] for x in image)
+                if moved not in orbit:
+                    orbit.add(moved)
+                    new.append(moved)
+        frontier = new
+    return orbit
+
+
+class RetractionStats(object):
+    """Counters of a search of retractions
+
+    The attributes are ``embeddings``, the number of embeddings of the
+    small graph in the large one that were tried, ``nodes``, the number
+    of assignments of an image to a vertex, ``backtracks``, the number
+    of times that the possible images of a vertex were exhausted,
+    ``max_depth``, the largest number of vertices assigned at the same
+    time, and ``reason``, which is ``"nodes"`` or ``"time"`` if the
+    search was stopped by that budget, and None otherwise.
+    """
+    def __init__(self):
+        self.embeddings = 0
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.reason = None
+
+    def __repr__(self):
+        return (f"RetractionStats(embeddings={self.embeddings}, "
+                f"nodes={self.nodes}, backtracks={self.backtracks}, "
+                f"max_depth={self.max_depth}, reason={self.reason!r})")
+
+    def _add(self, counters):
+        embeddings, nodes, backtracks, max_depth = counters
+        self.embeddings = self.embeddings+embeddings
+        self.nodes = self.nodes+nodes
+        self.backtracks = self.backtracks+backtracks
+        self.max_depth = max(self.max_depth, max_depth)
+
+    def _counters(self):
+        return (self.embeddings, self.nodes, self.backtracks, self.max_depth)
+
+
+class _Search(object):
+    """Budgets and counters of a search of retractions. The budget of
+    nodes is checked at each node, for what is left of it when the
+    search starts, and also against ``counter`` (a shared value with
+    the nodes of all the searches) if given, which is updated every
+    ``min(1024, max_nodes)`` nodes and by :meth:`flush`. The
+    time and ``cancel`` (a shared event) are checked at the first node
+    and every 1024 nodes after it, and with :meth:`check` at each
+    embedding."""
+    def __init__(self, stats, max_nodes=math.inf, deadline=math.inf,
+                 cancel=None, counter=None):
+        self.stats = stats
+        self.max_nodes = max_nodes
+        self.deadline = deadline
+        self.cancel = cancel
+        self.counter = counter
+        self.report = int(max(1, min(1024, max_nodes)))
+        self.base = 0 if counter is None else counter.value
+
+    def node(self, depth):
+        """Count a node at the given depth. Returns True if the search
+        was cancelled, and raises ``_BudgetExceeded`` if a budget is
+        exhausted."""
+        stats = self.stats
+        stats.nodes = stats.nodes+1
+        if depth > stats.max_depth:
+            stats.max_depth = depth
+        if stats.nodes > self.max_nodes-self.base:
+            raise _BudgetExceeded("nodes")
+        if self.counter is not None and stats.nodes % self.report == 0:
+            with self.counter.get_lock():
+                self.counter.value = self.counter.value+self.report
+            if self.counter.value > self.max_nodes:
+                raise _BudgetExceeded("nodes")
+        if stats.nodes % 1024 == 1:
+            return self.check()
+        return False
+
+    def check(self):
+        """Returns True if the search was cancelled, and raises
+        ``_BudgetExceeded`` if the time is over."""
+        if time.monotonic() > self.deadline:
+            raise _BudgetExceeded("time")
+        return self.cancel is not None and self.cancel.is_set()
+
+    def flush(self):
+        """Add to ``counter`` the nodes not added yet"""
+        if self.counter is not None:
+            with self.counter.get_lock():
+                self.counter.value = (self.counter.value +
+                                      self.stats.nodes % self.report)
+
+
+class _BudgetedMatcher(isomorphism.GraphMatcher):
+    """A GraphMatcher that checks the time of ``search`` every 1024
+    pairs of vertices tried, so that finding the embeddings is budgeted
+    too."""
+    def __init__(self, large, small, search):
+        super().__init__(large, small)
+        self.search = search
+        self.pairs = 0
+
+    def semantic_feasibility(self, G1_node, G2_node):
+        self.pairs = self.pairs+1
+        if self.pairs % 1024 == 0 and time.monotonic() > self.search.deadline:
+            raise _BudgetExceeded("time")
+        return True
+
+
+def _retractions(large, small, search, generators=None):
+    for ret in _embeddings(large, small, generators, search):
+        if search.check():
+            return
+        search.stats.embeddings = search.stats.embeddings+1
+        if large.order() == small.order():
+            yield (ret, invert_dict(ret))
+        else:
+            state = dict_to_tuple(ret)
+            for ext in _extend_retraction(large, small, state, search):
+                yield (dict(state+ext), invert_dict(ret))
 
 
-def retraction(large, small):
+def retraction(large, small, max_nodes=math.inf, timeout=math.inf,
+               stats=None):
     """Generator of retractions from large to small.
 
     Args:
       large (networkx.classes.graph.Graph): graph
       small (networkx.classes.graph.Graph): graph
+      max_nodes (int): largest number of assignments tried
+      timeout (float): seconds allowed for the search, counted from the
+        first retraction asked for
+      stats (RetractionStats): if given, the counters of the search are
+        updated here
 
     Returns:
       A generator of the retractions from a graph to other.
@@ -141,7 +343,8 @@ def retraction(large, small):
       defines a map from large to small and the second defines a
       a map from the small to the large (this is an inclusion).
       The composition of the second map with the first has to be
-      the identity.
+      the identity. If a budget is exhausted, the generator stops, and
+      the budget is ``stats.reason``.
 
     Example:
       >>> import networkx as nx
@@ -152,59 +355,272 @@ def retraction(large, small):
       [({0: 0, 1: 1, 2: 0}, {0: 0, 1: 1}), ({0: 0, 1: 1, 2: 1}, {0: 0, 1: 1})]
 
     """
-    GM = isomorphism.GraphMatcher(large, small)
+    if stats is None:
+        stats = RetractionStats()
+    search = _Search(stats, max_nodes, time.monotonic()+timeout)
+    try:
+        yield from _retractions(large, small, search)
+    except _BudgetExceeded as budget:
+        stats.reason = budget.args[0]
+
+
+def _embeddings(large, small, generators=None, search=None):
+    """Generator of the induced subgraphs of large isomorphic to small,
+    as maps from large to small, one for each orbit under the
+    automorphisms of both graphs. The automorphisms of large are given
+    by ``generators``, if known. If ``search`` is given, its time is
+    checked while looking for the embeddings."""
+    if search is None:
+        GM = isomorphism.GraphMatcher(large, small)
+    else:
+        GM = _BudgetedMatcher(large, small, search)
     rets = GM.subgraph_isomorphisms_iter()
-    a_small = list(automorphisms(small))
-    a_large = list(automorphisms(large))
-    all_autos = [(auto_s, auto_l) for auto_s in a_small for auto_l in a_large]
-    repeated = []
+    # Two embeddings with the same image differ by an automorphism of
+    # small, so up to automorphisms of both graphs an embedding is given
+    # by the orbit of its image under the automorphisms of large.
+    if generators is None:
+        generators = automorphism_generators(large)
+    repeated = set()
     for ret in rets:
-        if ret not in repeated:
-            if large.order() == small.order():
-                yield (ret, invert_dict(ret))
-            else:
-                state = dict_to_tuple(ret)
-                _logger.info("So far: {}".format(state))
-                extension = _extend_retraction(large, small, state)
-                for ext in extension:
-                    yield (dict(state+ext), invert_dict(ret))
-            for auto_s, auto_l in all_autos:
-                new_repeated = dict([(auto_l[x], auto_s[ret[x]]) for x in ret])
-                repeated.append(new_repeated)
+        image = frozenset(ret)
+        if image not in repeated:
+            yield ret
+            repeated.update(_orbit(image, generators))
 
 
-def retracts(large, small):
+def retracts(large, small, processes=1, max_nodes=math.inf,
+             timeout=math.inf, stats=None):
     """Whether the graph large retracts to small
 
     Args:
       large (networkx.classes.graph.Graph): graph
       small (networkx.classes.graph.Graph): graph
+      processes (int): number of processes. With more than one, the
+        embeddings of small in large are distributed among a pool of
+        processes, which all stop as soon as one of them finds a
+        retraction, so the retraction returned may be a different one.
+      max_nodes (int): largest number of assignments tried, in all the
+        processes together
+      timeout (float): seconds allowed for the search. The time is
+        checked at each embedding and every 1024 assignments, and the
+        nodes of the other processes every ``min(1024, max_nodes)``
+        assignments.
+      stats (RetractionStats): if given, the counters of the search are
+        updated here
 
     Returns:
       If there is a retraction from large to small, return it.
-      Otherwise, return False.
+      Otherwise, return False. If a budget was exhausted before
+      deciding, return None (and the budget is ``stats.reason``).
 
    Example:
       >>> import networkx as nx
-      >>> from pycliques.retractions import retracts
+      >>> from pycliques.retractions import retracts, RetractionStats
       >>> retracts(nx.wheel_graph(5), nx.cycle_graph(4))
       False
       >>> retracts(nx.path_graph(3), nx.path_graph(2))
       ({0: 0, 1: 1, 2: 0}, {0: 0, 1: 1})
+      >>> large = nx.circulant_graph(12, [1, 2, 3])
+      >>> stats = RetractionStats()
+      >>> bool(retracts(large, nx.cycle_graph(4), stats=stats))
+      True
+      >>> stats.embeddings, stats.nodes, stats.reason
+      (1, 8, None)
+      >>> stats = RetractionStats()
+      >>> retracts(large, nx.cycle_graph(4), max_nodes=5, stats=stats) is None
+      True
+      >>> stats.reason
+      'nodes'
 
     """
+    if stats is None:
+        stats = RetractionStats()
+    return _retracts(large, small, processes, max_nodes,
+                     time.monotonic()+timeout, stats)
+
+
+def _retracts(large, small, processes, max_nodes, deadline, stats,
+              generators=None):
+    """``retracts`` with an absolute ``deadline``, where ``max_nodes``
+    bounds ``stats.nodes``"""
+    if processes > 1 and large.order() > small.order():
+        return _parallel_retracts(large, small, processes,
+                                  max_nodes-stats.nodes, deadline, stats,
+                                  generators)
     try:
-        rets = retraction(large, small)
-        return next(rets)
+        search = _Search(stats, max_nodes, deadline)
+        return next(_retractions(large, small, search, generators))
     except StopIteration:
         return False
+    except _BudgetExceeded as budget:
+        stats.reason = budget.args[0]
+        return None
+
+
+# State of a worker process of _parallel_retracts
+_worker = dict()
+
+
+def _init_retraction_worker(large, small, found, counter, max_nodes,
+                            deadline):
+    _worker["large"] = large
+    _worker["small"] = small
+    _worker["found"] = found
+    _worker["counter"] = counter
+    _worker["max_nodes"] = max_nodes
+    _worker["deadline"] = deadline
 
 
-def retracts_to(subgraph):
+def _retract_embeddings(embeddings):
+    """Look for a retraction extending some of the embeddings, and stop
+    when any process has found one. Returns the retraction (or False),
+    the name of the exhausted budget (or None) and the counters."""
+    large, small, found = _worker["large"], _worker["small"], _worker["found"]
+    stats = RetractionStats()
+    search = _Search(stats, _worker["max_nodes"], _worker["deadline"], found,
+                     _worker["counter"])
+    try:
+        for ret in embeddings:
+            if search.check():
+                break
+            stats.embeddings = stats.embeddings+1
+            state = dict_to_tuple(ret)
+            for ext in _extend_retraction(large, small, state, search):
+                found.set()
+                return ((dict(state+ext), invert_dict(ret)), None,
+                        stats._counters())
+    except _BudgetExceeded as budget:
+        found.set()
+        return False, budget.args[0], stats._counters()
+    finally:
+        search.flush()
+    return False, None, stats._counters()
+
+
+def _parallel_retracts(large, small, processes, max_nodes, deadline, stats,
+                       generators=None, batch=8):
+    """``retracts`` with a pool of ``processes`` processes, each getting
+    batches of ``batch`` embeddings"""
+    embeddings = _embeddings(large, small, generators,
+                             _Search(stats, deadline=deadline))
+    found = multiprocessing.Event()
+    counter = multiprocessing.Value('q', 0)
+    with ProcessPoolExecutor(processes, initializer=_init_retraction_worker,
+                             initargs=(large, small, found, counter,
+                                       max_nodes, deadline)) as pool:
+        running = set()
+        exhausted = False
+        while True:
+            while not exhausted and len(running) < 2*processes:
+                try:
+                    chunk = list(itertools.islice(embeddings, batch))
+                except _BudgetExceeded as budget:
+                    _stop_workers(found, running, stats)
+                    stats.reason = budget.args[0]
+                    return None
+                if not chunk:
+                    exhausted = True
+                else:
+                    running.add(pool.submit(_retract_embeddings, chunk))
+            if not running:
+                return False
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            results = [future.result() for future in done]
+            for result, reason, counters in results:
+                stats._add(counters)
+            for result, reason, counters in results:
+                if result or reason is not None:
+                    _stop_workers(found, running, stats)
+                    if result:
+                        return result
+                    stats.reason = reason
+                    return None
+
+
+def _stop_workers(found, running, stats):
+    """Stop the ``running`` futures of ``_parallel_retracts``, adding
+    their counters to ``stats``"""
+    found.set()
+    for other in running:
+        other.cancel()
+    for other in running:
+        if not other.cancelled():
+            stats._add(other.result()[2])
+
+
+def _invariants(graph):
+    """The order, the degrees in decreasing order and the clique number
+    of a graph"""
+    degrees = sorted((d for v, d in graph.degree()), reverse=True)
+    clique_number = max((len(q) for q in nx.find_cliques(graph)), default=0)
+    return graph.order(), degrees, clique_number
+
+
+def _may_contain(large, small):
+    """Whether a graph with the invariants ``large`` may have an induced
+    subgraph with the invariants ``small``"""
+    return (small[0] <= large[0] and small[2] <= large[2] and
+            all(d <= e for d, e in zip(small[1], large[1])))
+
+
+def retracts_to_any(large, targets, processes=1, max_nodes=math.inf,
+                    timeout=math.inf, stats=None):
+    """Whether the graph large retracts to some of the targets
+
+    This is :func:`retracts` for each of the targets in turn, but the
+    automorphisms and the invariants of large are computed once, and
+    the targets that cannot be induced subgraphs of large, by their
+    order, degrees or clique number, are skipped.
+
+    Args:
+      large (networkx.classes.graph.Graph): graph
+      targets (list): graphs
+      processes, max_nodes, timeout, stats: as in :func:`retracts`, but
+        the budgets are for all the targets together
+
+    Returns:
+      A pair with the index in targets of the first target to which
+      large retracts, and the retraction. Otherwise, return False, or
+      None if a budget was exhausted before deciding.
+
+    Example:
+      >>> import networkx as nx
+      >>> from pycliques.retractions import retracts_to_any
+      >>> from pycliques.named import suspension_of_cycle
+      >>> targets = [nx.complete_graph(5), nx.cycle_graph(4), nx.path_graph(2)]
+      >>> retracts_to_any(nx.wheel_graph(5), targets)
+      (2, ({0: 0, 1: 1, 2: 0, 3: 0, 4: 0}, {0: 0, 1: 1}))
+      >>> targets = [suspension_of_cycle(5), suspension_of_cycle(6)]
+      >>> retracts_to_any(suspension_of_cycle(6), targets)[0]
+      1
+
+    """
+    if stats is None:
+        stats = RetractionStats()
+    deadline = time.monotonic()+timeout
+    invariants = _invariants(large)
+    generators = None
+    for i, small in enumerate(targets):
+        if not _may_contain(invariants, _invariants(small)):
+            continue
+        if generators is None:
+            generators = automorphism_generators(large)
+        result = _retracts(large, small, processes, max_nodes, deadline,
+                           stats, generators)
+        if result is None:
+            return None
+        if result:
+            return i, result
+    return False
+
+
+def retracts_to(subgraph, processes=1, max_nodes=math.inf,
+                timeout=math.inf):
     """Boolean function that gives the retraction to a subgraph
 
     Args:
       large (networkx.classes.graph.Graph): graph
+      processes, max_nodes, timeout: as in :func:`retracts`
 
     Returns:
       A boolean function that determines if its argument retracts to
@@ -219,7 +635,7 @@ def retracts_to(subgraph):
       ({0: 0, 1: 1, 2: 0}, {0: 0, 1: 1})
 
     """
-    return lambda g: retracts(g, subgraph)
+    return lambda g: retracts(g, subgraph, processes, max_nodes, timeout)
 
 
 def has_induced(large, small):
@@ -267,13 +683,14 @@ def _main(args):
     _setup_logging(args.loglevel)
     large = nx.from_graph6_bytes(bytes(args.large, 'utf8'))
     small = _string_to_graph(args.small)
-    for i in range(index):
-        _logger.info("Iterating the clique operator")
-        large = completely_pared_graph(clique_graph(large))
+    tower = iterated_clique_graphs(large, index, compact=True,
+                                   processes=args.processes)
+    for i, large in tower:
+        _logger.info("Clique graph of index {} computed".format(i))
     large = nx.convert_node_labels_to_integers(large)
     _logger.info("The large graph has order {}".format(large.order()))
     _logger.info("Searching for retractions")
-    has_retraction = retracts(large, small)
+    has_retraction = retracts(large, small, args.processes)
     if has_retraction:
         print("Found {}".format(has_retraction))
     else:
@@ -1,18 +1,18 @@
 import argparse
+import contextlib
+import math
 import sys
 import logging
-import gzip
-
-import networkx as nx
 
 from pycliques import __version__
-from pycliques.cliques import clique_graph
-from pycliques.helly import is_clique_helly
-from pycliques.dominated import completely_pared_graph
+from pycliques.batch import completely_pared, to_graphs
+from pycliques.cache import CliqueCache
+from pycliques.cliques import iterated_clique_graphs
+from pycliques.helly import is_clique_helly, is_clique_graph_helly
 from pycliques.special import special_octahedra
-from pycliques.retractions import retracts, retracts_to
+from pycliques.retractions import retracts_to_any
 from pycliques.named import suspension_of_cycle, complement_of_cycle
-from pycliques.lists import _dict_connected
+from pycliques.lists import adjacency_chunks
 
 from rich.logging import RichHandler
 
@@ -48,6 +48,29 @@ def _parse_args(args):
         help="order of graphs considered",
         type=int,
         metavar="INT")
+    parser.add_argument(
+        '-c',
+        '--cache',
+        dest="cache",
+        help="SQLite file where the clique graphs are cached between runs",
+        type=str,
+        metavar="FILE")
+    parser.add_argument(
+        '-p',
+        '--processes',
+        dest="processes",
+        help="number of processes used to find retractions",
+        type=int,
+        default=1,
+        metavar="INT")
+    parser.add_argument(
+        '-t',
+        '--timeout',
+        dest="timeout",
+        help="seconds allowed to look for retractions of each graph",
+        type=float,
+        default=math.inf,
+        metavar="SECONDS")
     parser.add_argument(
         '-v',
         '--verbose',
@@ -76,13 +99,14 @@ def _setup_logging(loglevel):
                         format=logformat, datefmt="%Y-%m-%d %H:%M:%S")
 
 
-def is_eventually_helly(graph, tries=8, bound=30):
+def is_eventually_helly(graph, tries=8, bound=30, cache=None):
     """Whether `graph` is eventually Helly
 
     Args:
       graph (networkx.classes.graph.Graph): graph
       tries : int
       bound : int
+      cache (pycliques.cache.CliqueCache): cache for the clique graphs
 
     Returns:
       True if an iterated clique graph with index less than `tries` of `graph`
@@ -99,28 +123,34 @@ def is_eventually_helly(graph, tries=8, bound=30):
       True
 
     """
-    i = 0
-    while not is_clique_helly(graph) and i < tries:
-        i = i+1
-        graph = clique_graph(graph, bound)
-        if graph is None:
+    tower = iterated_clique_graphs(graph, tries, max_order=bound,
+                                   cache=cache)
+    for i, graph in tower:
+        if is_clique_helly(graph):
+            _logger.info(f"Helly of index {i}")
+            return True
+        if i == tries:
+            break
+        # a Helly clique graph has a Helly pared graph, so the next
+        # level can be accepted from the cliques of this one, before the
+        # tower builds it; otherwise the pared level is still checked
+        helly = is_clique_graph_helly(graph, bound)
+        if helly is None:
             return False
-        else:
-            graph = completely_pared_graph(graph)
-    if is_clique_helly(graph):
-        _logger.info(f"Helly of index {i}")
-        return True
-    else:
-        return False
+        if helly:
+            _logger.info(f"Helly of index {i+1}")
+            return True
+    return False
 
 
-def eventually_retracts_specially(graph, tries=8, bound=20):
+def eventually_retracts_specially(graph, tries=8, bound=20, cache=None):
     """Whether `graph` eventually retracts specially to an octahedron
 
     Args:
       graph (networkx.classes.graph.Graph): graph
       tries : int
       bound : int
+      cache (pycliques.cache.CliqueCache): cache for the clique graphs
 
     Returns:
       True if an iterated clique graph of `graph` with index less than `tries`
@@ -139,40 +169,31 @@ def eventually_retracts_specially(graph, tries=8, bound=20):
       True
 
     """
-
-    i = 0
-    while i < tries and not special_octahedra(graph):
-        i = i+1
-        graph = clique_graph(graph, bound)
-        if graph is None:
-            return False
-        else:
-            graph = completely_pared_graph(graph)
-    if i == tries:
+    if tries <= 0:
         return False
-    else:
-        _logger.info("Index {} has induced special octahedra".format(i))
-        return True
+    tower = iterated_clique_graphs(graph, tries-1, max_order=bound,
+                                   cache=cache)
+    for i, graph in tower:
+        if special_octahedra(graph):
+            _logger.info("Index {} has induced special octahedra".format(i))
+            return True
+    return False
 
 
 def retracts_to_some_suspension_of_cycle(g, indices):
     """Whether the graph retracts to some suspension of a cycle"""
 
-    for n in indices:
-        if retracts(g, suspension_of_cycle(n)):
-            return n
-    else:
-        return False
+    indices = list(indices)
+    found = retracts_to_any(g, [suspension_of_cycle(n) for n in indices])
+    return indices[found[0]] if found else False
 
 
 def retracts_to_some_complement_of_cycle(g, indices):
     """Whether the graph retracts to some complement of a cycle"""
 
-    for n in indices:
-        if retracts(g, complement_of_cycle(n)):
-            return n
-    else:
-        return False
+    indices = list(indices)
+    found = retracts_to_any(g, [complement_of_cycle(n) for n in indices])
+    return indices[found[0]] if found else False
 
 
 def _main(args):
@@ -188,37 +209,42 @@ def _main(args):
     further = []
     convergent = []
     divergent = []
-    all_graphs = _dict_connected[args.n]
     index = 0
-    with gzip.open(all_graphs, 'rt') as graph_file:
-        for graph in graph_file:
-            graph = graph.strip()
-            graph = nx.from_graph6_bytes(bytes(graph, 'utf8'))
-            _logger.debug("Considering graph with index {}".format(index))
-            graph = completely_pared_graph(graph)
-            if is_eventually_helly(graph):
-                calculations[index] = "is eventually Helly"
-                convergent.append(index)
-            elif special_octahedra(graph):
-                calculations[index] = "has an induced special octahedron"
-                divergent.append(index)
-            elif retracts_to(suspension_of_cycle(5))(graph):
-                calculations[index] = "retracts to Susp(C_5)"
-                divergent.append(index)
-            elif retracts_to(suspension_of_cycle(6))(graph):
-                calculations[index] = "retracts to Susp(C_6)"
-                divergent.append(index)
-            elif retracts_to(complement_of_cycle(8))(graph):
-                calculations[index] = "retracts to Comp(C_8)"
-                divergent.append(index)
-            elif eventually_retracts_specially(graph):
-                calculations[index] = "eventually has a special octahedron"
-                divergent.append(index)
-            else:
-                calculations[index] = "has character unknown so far"
-                further.append(index)
-            _logger.debug(f"This graph {calculations[index]}")
-            index = index + 1
+    # canonical forms cost more than the clique operator on the small
+    # levels of a census, so the cache only pays off between runs
+    if args.cache is None:
+        cache = None
+    else:
+        cache = CliqueCache(path=args.cache)
+    targets = [suspension_of_cycle(5), suspension_of_cycle(6),
+               complement_of_cycle(8)]
+    names = ["Susp(C_5)", "Susp(C_6)", "Comp(C_8)"]
+    with cache if cache is not None else contextlib.nullcontext():
+        for chunk in adjacency_chunks(args.n):
+            pared = completely_pared(chunk)
+            for graph in to_graphs(chunk, pared):
+                _logger.debug(f"Considering graph with index {index}")
+                if is_eventually_helly(graph, cache=cache):
+                    calculations[index] = "is eventually Helly"
+                    convergent.append(index)
+                elif special_octahedra(graph):
+                    calculations[index] = "has an induced special octahedron"
+                    divergent.append(index)
+                else:
+                    found = retracts_to_any(graph, targets, args.processes,
+                                            timeout=args.timeout)
+                    if found:
+                        calculations[index] = f"retracts to {names[found[0]]}"
+                        divergent.append(index)
+                    elif eventually_retracts_specially(graph, cache=cache):
+                        calculations[index] = \
+                            "eventually has a special octahedron"
+                        divergent.append(index)
+                    else:
+                        calculations[index] = "has character unknown so far"
+                        further.append(index)
+                _logger.debug(f"This graph {calculations[index]}")
+                index = index + 1
     _logger.info(f"Indices that deserve further study: {further}")
     _logger.info(f"There are {len(convergent)} surely convergent graphs")
     _logger.info(f"There are {len(divergent)} surely divergent graphs")
@@ -8,8 +8,8 @@ import sys
 
 
 from pycliques import __version__
-from pycliques.cliques import clique_graph
-from pycliques.dominated import completely_pared_graph
+from pycliques.cliques import iterated_clique_graphs
+from pycliques.dominated import NeighborhoodIndex, _bits
 from pycliques.surfaces import is_regular
 
 
@@ -36,6 +36,14 @@ def _parse_args(args):
         help="index of clique graph",
         type=int,
         metavar="INT")
+    parser.add_argument(
+        '-p',
+        '--processes',
+        dest="processes",
+        help="number of processes used to find cliques",
+        type=int,
+        default=1,
+        metavar="INT")
     parser.add_argument(
         '-v',
         '--verbose',
@@ -70,28 +78,19 @@ def _adjacency_f(graph, edges):
     return is_regular(subgraph, 1)
 
 
-def _is_clique(graph, clique):
-    for v in graph:
-        if not(v in clique):
-            for w in clique:
-                # if there is no edge between v, w then the clique
-                # cannot be extended with v, so we check the next
-                # vertex
-                if not(graph.has_edge(v, w)):
-                    break
-            else:
-                # this happens if there is an edge v,w for every w in
-                # clique, hence clique+{v} is complete, and so clique
-                # is not maximal complete
-                return False
-    else:
-        # this happens if every vertex outside clique has been
-        # verified as not a valid extension of clique to a larger
-        # complete
-        return True
+def _is_clique(index, clique):
+    # clique is maximal complete if no vertex outside it is adjacent to
+    # all of its vertices, that is, if the intersection of the closed
+    # neighborhoods of its vertices is just clique
+    mask = index.mask(clique)
+    common = index.alive
+    for i in _bits(mask):
+        common = common & index.closed[i]
+    return common == mask
 
 
 def special_octahedra(graph):
+    index = NeighborhoodIndex(graph)
     c_graph = complement(graph)
     aux_graph = nx.Graph()
     edges_complement = c_graph.edges()
@@ -117,7 +116,7 @@ def special_octahedra(graph):
                     try:
                         clique_octa = next(cliques_octa)
                         _logger.info("Trying complete {}".format(clique_octa))
-                        if _is_clique(graph, clique_octa):
+                        if _is_clique(index, clique_octa):
                             _logger.info("{} {}".format(octa.nodes,
                                                         clique_octa))
                             return True
@@ -134,9 +133,10 @@ def _main(args):
     index = args.n
     _setup_logging(args.loglevel)
     graph = nx.from_graph6_bytes(bytes(args.graph_string, 'utf8'))
-    for i in range(index):
-        _logger.info("Iterating the clique operator")
-        graph = completely_pared_graph(clique_graph(graph))
+    tower = iterated_clique_graphs(graph, index, compact=True,
+                                   processes=args.processes)
+    for i, graph in tower:
+        _logger.info("Clique graph of index {} computed".format(i))
     graph = nx.convert_node_labels_to_integers(graph)
     _logger.info("This graph has order {}".format(graph.order()))
     _logger.info("Searching for octahedra")
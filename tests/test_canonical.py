@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pycliques.canonical import canonical_form
+from pycliques.lists import list_graphs
+from pycliques.named import octahedron
+import networkx as nx
+import random
+
+__author__ = "Rafael Villarroel"
+__copyright__ = "Rafael Villarroel"
+__license__ = "mit"
+
+
+def _shuffled(graph):
+    vertices = list(graph)
+    random.shuffle(vertices)
+    return nx.relabel_nodes(graph, dict(zip(graph, vertices)))
+
+
+def test_canonical_form():
+    random.seed(0)
+    graphs = list_graphs(6)
+    forms = [canonical_form(g) for g in graphs]
+    assert len(set(forms)) == len(graphs)
+    for g, form in zip(graphs, forms):
+        assert canonical_form(_shuffled(g)) == form
+    for g in [nx.complete_graph(12), nx.petersen_graph(), octahedron(8)]:
+        assert canonical_form(_shuffled(g)) == canonical_form(g)
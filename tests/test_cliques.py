@@ -2,7 +2,9 @@
 # -*- coding: utf-8 -*-
 
 from pycliques.helly import is_clique_helly
+from pycliques.cliques import clique_graph
 import networkx as nx
+import tracemalloc
 
 __author__ = "Rafael Villarroel"
 __copyright__ = "Rafael Villarroel"
@@ -18,3 +20,26 @@ def test_is_clique_helly():
     assert not is_clique_helly(octa)
     assert is_clique_helly(path5)
     assert is_clique_helly(cyc3)
+
+
+def test_clique_graph_algorithms():
+    for graph in [octa, path5, cyc3, nx.icosahedral_graph(),
+                  nx.circulant_graph(9, [1, 2]), nx.petersen_graph()]:
+        k1 = clique_graph(graph, algorithm="pairs")
+        k2 = clique_graph(graph, algorithm="incidence")
+        assert list(k1.nodes()) == list(k2.nodes())
+        assert list(k1.edges()) == list(k2.edges())
+
+
+def test_clique_matrix_memory():
+    # a cone, whose apex lies in every clique
+    graph = nx.gnp_random_graph(70, 0.5, seed=2)
+    graph.add_edges_from((-1, v) for v in range(70))
+    tracemalloc.start()
+    try:
+        matrix = clique_graph(graph, matrix=True)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert matrix.size() == matrix.order()*(matrix.order()-1)//2
+    assert peak < matrix.adjacency.nbytes + (32 << 20)
@@ -0,0 +1,25 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pycliques.dominated import pared_graph, pared_index, twin_classes
+import networkx as nx
+
+__author__ = "Rafael Villarroel"
+__copyright__ = "Rafael Villarroel"
+__license__ = "mit"
+
+
+def _graph(edges):
+    graph = nx.empty_graph(4)
+    graph.add_edges_from(edges)
+    return graph
+
+
+def test_pared_graph_keeps_twin_representatives():
+    graph = _graph([(0, 2), (0, 3), (1, 2), (2, 3)])
+    assert twin_classes(graph) == [[0, 3], [1], [2]]
+    assert list(pared_graph(graph)) == [0, 2]
+    graph = _graph([(0, 1), (0, 2), (0, 3), (1, 3)])
+    assert twin_classes(graph) == [[0], [1, 3], [2]]
+    assert list(pared_graph(graph)) == [0, 1]
+    assert pared_index(graph) == 2
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pycliques.retractions import retracts, retraction, RetractionStats, \
+    is_map
+import networkx as nx
+import itertools
+import time
+
+__author__ = "Rafael Villarroel"
+__copyright__ = "Rafael Villarroel"
+__license__ = "mit"
+
+
+def test_retracts_timeout():
+    large = nx.gnp_random_graph(60, 0.5, seed=1)
+    for processes in [1, 2]:
+        stats = RetractionStats()
+        start = time.monotonic()
+        result = retracts(large, nx.cycle_graph(4), processes=processes,
+                          timeout=0.2, stats=stats)
+        assert result is None
+        assert stats.reason == "time"
+        assert time.monotonic()-start < 2
+    stats = RetractionStats()
+    assert not list(retraction(large, nx.cycle_graph(4), timeout=0.2,
+                               stats=stats))
+    assert stats.reason == "time"
+
+
+def _retracts_reference(large, small):
+    """Whether large retracts to small, trying every map from large to
+    small that fixes an induced copy of small"""
+    matcher = nx.algorithms.isomorphism.GraphMatcher(large, small)
+    for embedding in matcher.subgraph_isomorphisms_iter():
+        free = [v for v in large if v not in embedding]
+        for images in itertools.product(list(small), repeat=len(free)):
+            ismap = dict(embedding)
+            ismap.update(zip(free, images))
+            if is_map(large, small, ismap):
+                return True
+    return False
+
+
+def test_retraction_extensions():
+    smalls = [nx.path_graph(2), nx.path_graph(3), nx.cycle_graph(4),
+              nx.complete_graph(3)]
+    for seed in range(40):
+        large = nx.gnp_random_graph(6, 0.5, seed=seed)
+        for small in smalls:
+            expected = _retracts_reference(large, small)
+            assert bool(retracts(large, small)) == expected
+            maps = list(retraction(large, small))
+            assert bool(maps) == expected
+            keys = [(tuple(sorted(ret.items())),
+                     tuple(sorted(inclusion.items())))
+                    for ret, inclusion in maps]
+            assert len(keys) == len(set(keys))
+            for ret, inclusion in maps:
+                assert set(ret) == set(large)
+                assert is_map(large, small, ret)
+                assert all(ret[inclusion[w]] == w for w in small)
+                image = large.subgraph(inclusion.values())
+                assert nx.is_isomorphic(image, small)
+
+
+def test_retracts_max_nodes():
+    large = nx.circulant_graph(12, [1, 2, 3])
+    for processes in [1, 2]:
+        stats = RetractionStats()
+        assert retracts(large, nx.cycle_graph(4), processes=processes,
+                        max_nodes=5, stats=stats) is None
+        assert stats.reason == "nodes"
+    large = nx.gnp_random_graph(40, 0.5, seed=1)
+    stats = RetractionStats()
+    assert retracts(large, nx.cycle_graph(4), processes=2, max_nodes=100,
+                    stats=stats) is None
+    assert stats.reason == "nodes"
+    assert stats.nodes < 200
@@ -0,0 +1,24 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pycliques.small import is_eventually_helly, \
+    eventually_retracts_specially
+from pycliques.named import octahedron
+import networkx as nx
+
+__author__ = "Rafael Villarroel"
+__copyright__ = "Rafael Villarroel"
+__license__ = "mit"
+
+
+def test_is_eventually_helly_checks_pared_level():
+    # K(G) is not clique-Helly, but its pared graph is
+    graph = nx.from_graph6_bytes(b"GrjrRc")
+    assert not is_eventually_helly(graph, tries=0)
+    assert is_eventually_helly(graph, tries=1)
+
+
+def test_eventually_retracts_specially_tries():
+    graph = octahedron(3)
+    assert not eventually_retracts_specially(graph, tries=0)
+    assert eventually_retracts_specially(graph, tries=1)